@@ -0,0 +1,276 @@
+import logging
+import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+from adapters.input.lazy_subtree import subtree_value
+from core import profiling
+from core.records import DATATYPES, Record, make_packer, make_record_type
+
+if TYPE_CHECKING:
+    from adapters.input.lazy_text import TextSpans
+
+logger = logging.getLogger(__name__)
+
+# Characters that turn a rule path into a real XPath expression (predicates, wildcards, ...).
+# Such paths are handed to ElementTree's own find(); plain "a/b/c" paths are compiled.
+_XPATH_SYNTAX = set("[]*@.()=|:")
+
+
+def element_text(element: ET.Element) -> Optional[str]:
+    # Leaf elements (the common case) carry their whole value in .text
+    if not len(element):
+        text = element.text
+    else:
+        # Use itertext() to capture text from nested tags (like <p>, <b> in formattedtext)
+        text = "".join(element.itertext())
+    return text.strip() if text else None
+
+
+class Selector:
+    """
+    Precompiled rule path. Plain tag paths are resolved one step at a time with the
+    C-level child lookup (same first-match order as Element.find), so they never go
+    through ElementPath and its small compiled-path cache.
+    """
+    __slots__ = ("path", "steps", "simple", "tag")
+
+    def __init__(self, path: str):
+        self.path = path
+        parts = path.strip().split('/')
+        self.steps: Tuple[str, ...] = tuple(part for part in parts if part)
+        # Only plain child paths are compiled: 'a//b' (descendants), a leading '/' or any
+        # XPath syntax keeps ElementTree's own semantics (and its errors)
+        self.simple = bool(parts) and all(parts) and not any(ch in _XPATH_SYNTAX for part in parts for ch in part)
+        # Single-step paths (most item fields) can be looked up directly
+        self.tag = self.steps[0] if self.simple and len(self.steps) == 1 else None
+
+    def first(self, node: ET.Element) -> Optional[ET.Element]:
+        if self.tag is not None:
+            return node.find(self.tag)
+        if not self.simple:
+            try:
+                return node.find(self.path)
+            except Exception:
+                # Catch bad path errors to ensure graceful failure
+                return None
+
+        found = node
+        for tag in self.steps:
+            found = found.find(tag)
+            if found is None:
+                break
+        else:
+            return found
+        # The first sibling along the way was a dead end: scan the others like find() would
+        return self._descend(node, 0)
+
+    def _descend(self, node: ET.Element, pos: int) -> Optional[ET.Element]:
+        tag = self.steps[pos]
+        last = pos == len(self.steps) - 1
+        for child in node:
+            if child.tag == tag:
+                if last:
+                    return child
+                found = self._descend(child, pos + 1)
+                if found is not None:
+                    return found
+        return None
+
+    def text(self, node: ET.Element) -> Optional[str]:
+        found = self.first(node)
+        return element_text(found) if found is not None else None
+
+
+class FieldPlan:
+    """One compiled field of a list rule ('text', 'flatten' or 'subtree') and its declared datatype."""
+    __slots__ = ("name", "kind", "datatype", "selector", "sub_selectors", "separator", "item_separator", "fallback")
+
+    def __init__(self, name: str, config: Any):
+        self.name = name
+        self.datatype = 'text'
+        self.sub_selectors: List[Selector] = []
+        self.separator = ' '
+        self.item_separator = ', '
+        self.fallback: Optional[Selector] = None
+
+        # Case 1: Simple Path (String)
+        if isinstance(config, str):
+            self.kind = 'text'
+            self.selector = Selector(config)
+            return
+
+        # Case 2: Advanced Configuration (Dictionary)
+        self.selector = Selector(config.get('path') or '')
+        self.datatype = config.get('datatype') or 'text'
+        extraction_type = config.get('type')
+        if extraction_type == 'flatten':
+            self.kind = 'flatten'
+            self.sub_selectors = [Selector(p) for p in config.get('sub_fields', [])]
+            self.separator = config.get('separator', ' ')
+            self.item_separator = config.get('item_separator', ', ')
+            if config.get('fallback_path'):
+                self.fallback = Selector(config['fallback_path'])
+        elif extraction_type == 'subtree':
+            self.kind = 'subtree'
+        else:
+            # Fallback or other future types
+            self.kind = 'text'
+        if self.kind == 'subtree':
+            self.datatype = 'text'
+
+    def extract(self, item: ET.Element) -> Any:
+        if self.kind == 'text':
+            return self.selector.text(item)
+
+        if self.kind == 'subtree':
+            # Expose the subtree as a lazy dict view (materialized on access)
+            sub_node = self.selector.first(item)
+            return subtree_value(sub_node) if sub_node is not None else None
+
+        # Flatten Logic: Iterate over children of the path and join sub-fields
+        sub_container = self.selector.first(item)
+        if sub_container is None:
+            # Fallback: If the container path doesn't exist, try a simple fallback path
+            return self.fallback.text(item) if self.fallback else None
+
+        flat_values = []
+        for sub_item in sub_container:
+            components = []
+            for sub_selector in self.sub_selectors:
+                comp_val = sub_selector.text(sub_item)
+                if comp_val:
+                    components.append(comp_val)
+            if components:
+                flat_values.append(self.separator.join(components))
+        return self.item_separator.join(flat_values) if flat_values else None
+
+
+class ListPlan:
+    """Compiled 'lists' rule: container selector plus one FieldPlan per field."""
+
+    def __init__(self, rule: Dict[str, Any]):
+        self.name: str = rule['name']
+        self.container = Selector(rule['container'])
+        self.item_pattern: str = rule['item_pattern']
+        self.required_field: Optional[str] = rule.get('required_field')
+        self.fields = [FieldPlan(name, config) for name, config in rule['fields'].items()]
+        # Items are stored as compact __slots__ records generated for this rule
+        self.record_type = make_record_type(self.name, tuple(f.name for f in self.fields), tuple(f.datatype for f in self.fields))
+        slot_of = self.record_type._slot_of
+        self._required_slot = slot_of.get(self.required_field) if self.required_field else None
+        # (slot, direct child tag or None, packer or None, plan) - plain single-tag text fields skip the FieldPlan call
+        self._steps = [(slot_of[f.name], f.selector.tag if f.kind == 'text' else None, make_packer(f.datatype), f)
+                       for f in self.fields]
+
+    def extract_items(self, container: ET.Element, spans: Optional["TextSpans"] = None) -> List[Record]:
+        items = []
+        profiler = profiling.active()
+        # Iterate over children that match the pattern (e.g., "id-")
+        for count, child in enumerate(container, 1):
+            if self.item_pattern in child.tag:
+                item_data = self.extract_item(child, spans)
+                # Only add item if we successfully extracted components
+                if item_data is not None:
+                    items.append(item_data)
+            if profiler is not None and not count % profiling.BUDGET_CHECK_EVERY:
+                profiler.check(f"list '{self.name}'")
+        return items
+
+    def extract_item(self, item: ET.Element, spans: Optional["TextSpans"] = None) -> Optional[Record]:
+        # One pass over the compiled fields; plain text fields are resolved inline and
+        # declared datatypes are coerced here, once. With spans (lazy text), a deferred
+        # text or subtree field is stored as its span of the input instead of the value
+        record = self.record_type.__new__(self.record_type)
+        record._extra = None
+        found_any = False
+        for slot, tag, packer, field in self._steps:
+            if tag is not None:
+                found = item.find(tag)
+                if found is None:
+                    continue
+                if spans is not None and packer is None:
+                    lazy = spans.get(found)
+                    if lazy is not None:
+                        setattr(record, slot, lazy)
+                        found_any = True
+                        continue
+                val = found.text if not len(found) else "".join(found.itertext())
+                if not val:
+                    continue
+                val = val.strip()
+                if not val:
+                    continue
+            else:
+                if spans is not None and field.kind == 'subtree':
+                    lazy = spans.subtree(field.selector.first(item))
+                    if lazy is not None:
+                        setattr(record, slot, lazy)
+                        found_any = True
+                        continue
+                val = field.extract(item)
+                if val is None or (isinstance(val, str) and val.strip() == ""):
+                    continue
+            if packer is not None:
+                val = packer(val)
+            setattr(record, slot, val)
+            found_any = True
+
+        # Validation: Check required field if specified
+        if self.required_field:
+            if self._required_slot is None or not hasattr(record, self._required_slot):
+                # Skip ghost item
+                return None
+        elif not found_any:
+            return None
+        return record
+
+
+def normalize_rules(rules: Any) -> Dict[str, Any]:
+    """
+    Validate a loaded rules document and return it in canonical form
+    ({'single': {key: path}, 'lists': [rule, ...]}). Malformed list rules are
+    reported and dropped here, so anything compiled from the result is clean.
+    """
+    if not isinstance(rules, dict):
+        raise ValueError(f"Rules document must be a mapping, got {type(rules).__name__}")
+
+    singles = rules.get('single') or {}
+    if not isinstance(singles, dict):
+        raise ValueError("'single' rules must be a mapping of field name -> path")
+
+    lists = []
+    for rule in rules.get('lists') or []:
+        if not isinstance(rule, dict) or not all([rule.get('name'), rule.get('container'), rule.get('item_pattern'), rule.get('fields', {})]) \
+                or not isinstance(rule.get('fields'), dict):
+            logger.warning(f"Skipping malformed list rule: {rule}")
+            continue
+        for field_name, config in rule['fields'].items():
+            if isinstance(config, dict) and config.get('datatype', 'text') not in DATATYPES:
+                logger.warning(f"Unknown datatype '{config['datatype']}' for field '{field_name}' in list '{rule['name']}'; treating it as text")
+                rule = dict(rule, fields=dict(rule['fields'], **{field_name: dict(config, datatype='text')}))
+        lists.append(rule)
+
+    normalized = dict(rules)
+    normalized['single'] = {str(key): str(xpath) for key, xpath in singles.items()}
+    normalized['lists'] = lists
+    return normalized
+
+
+class ExtractionPlan:
+    """
+    The rules YAML compiled once into selectors and per-list field plans.
+    Rules are passed through normalize_rules() first, unless they already were
+    (normalized=True, e.g. rules loaded through the RulesCache).
+    """
+
+    def __init__(self, singles: List[Tuple[str, Selector]], lists: List[ListPlan]):
+        self.singles = singles
+        self.lists = lists
+
+    @classmethod
+    def compile(cls, rules: Dict[str, Any], normalized: bool = False) -> "ExtractionPlan":
+        if not normalized:
+            rules = normalize_rules(rules)
+        singles = [(key, Selector(xpath)) for key, xpath in rules['single'].items()]
+        lists = [ListPlan(rule) for rule in rules['lists']]
+        return cls(singles, lists)
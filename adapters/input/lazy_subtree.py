@@ -0,0 +1,92 @@
+import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+
+def subtree_value(element: ET.Element) -> Any:
+    """Leaf -> its text, anything else -> a LazySubtree (same shape the old dict conversion produced)."""
+    if len(element) == 0:
+        return element.text or ""
+    return LazySubtree(element)
+
+
+class LazySubtree(Mapping):
+    """
+    Read-only dict view of an XML subtree ('subtree' extraction type, e.g. DamageData, actions).
+    Children are indexed on first access and each value is only converted when it is looked up,
+    so enrichers that read a handful of keys never pay for the rest of the tree.
+    Repeated child tags become a list, leaves become their text, exactly like the former
+    eager conversion. Nothing here recurses, so arbitrarily deep trees are safe.
+    """
+    __slots__ = ("_element", "_children", "_values")
+
+    def __init__(self, element: ET.Element):
+        self._element = element
+        self._children = None  # tag -> Element or [Element, ...]
+        self._values: Dict[str, Any] = {}
+
+    def _index(self) -> Dict[str, Any]:
+        if self._children is None:
+            children = {}
+            for child in self._element:
+                existing = children.get(child.tag)
+                if existing is None:
+                    children[child.tag] = child
+                elif isinstance(existing, list):
+                    existing.append(child)
+                else:
+                    children[child.tag] = [existing, child]
+            self._children = children
+        return self._children
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        raw = self._index()[key]
+        value = [subtree_value(e) for e in raw] if isinstance(raw, list) else subtree_value(raw)
+        self._values[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index())
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index()
+
+    def __repr__(self) -> str:
+        return f"LazySubtree(<{self._element.tag}>, {len(self)} keys)"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fully materialize into plain dicts/lists/strings (iteratively, no recursion)."""
+        root: Dict[str, Any] = {}
+        stack: List[Any] = [(self, root)]
+        while stack:
+            view, target = stack.pop()
+            for key in view:
+                value = view[key]
+                if isinstance(value, list):
+                    converted = []
+                    for entry in value:
+                        if isinstance(entry, LazySubtree):
+                            child: Dict[str, Any] = {}
+                            stack.append((entry, child))
+                            converted.append(child)
+                        else:
+                            converted.append(entry)
+                    target[key] = converted
+                elif isinstance(value, LazySubtree):
+                    child = {}
+                    stack.append((value, child))
+                    target[key] = child
+                else:
+                    target[key] = value
+        return root
+
+    def __reduce__(self):
+        # Pickle / deepcopy / process pools get plain dicts; the XML nodes stay behind
+        return (dict, (self.to_dict(),))
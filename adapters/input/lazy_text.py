@@ -0,0 +1,287 @@
+"""
+Lazy long-text and subtree fields for XMLReader.parse(lazy_text=True).
+
+The document is parsed with pyexpat driving an ElementTree TreeBuilder, which gives the
+byte offset of every tag (CurrentByteIndex). Long plain-text fields of list items (spell
+descriptions...) and their 'subtree' fields (spell actions, weapon damage lists) never
+enter the tree: only the element's byte span is kept, and the record stores a LazyText or
+a LazyTree. When the field is read, the span is read from a memory-mapped view of the
+input and decoded like the eager path would (all nested text, stripped / the same
+LazySubtree view). Nothing is cached, so a Character keeps a few bytes per field however
+large the text or subtree is. Subtrees are most of what an eager Character retains
+(every element, attribute dict and whitespace tail of them); description text is less.
+
+The price is parse time: the Python-level expat callbacks make the parse about twice as
+slow as the eager C parser, and every read of a deferred field parses its span again.
+
+The input file must stay in place, unchanged, while such a Character is in use; a changed
+file is detected (size/mtime) whenever it's mapped. Character.close() (called by the
+pipeline after every export) unmaps it, so it isn't held open between exports; it's
+mapped again if more text is needed.
+"""
+import mmap
+import os
+import threading
+import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
+from xml.parsers import expat
+
+from adapters.input.lazy_subtree import subtree_value
+from core import profiling
+from core.records import Deferred
+
+if TYPE_CHECKING:
+    from adapters.input.extraction_plan import ExtractionPlan
+
+# Shorter text is kept as a plain string: a span isn't worth it
+LAZY_TEXT_MIN = 100
+# Input fed to the parser per call (a memory budget is checked between calls)
+_CHUNK = 1 << 16
+
+
+class SourceChanged(RuntimeError):
+    pass
+
+
+class SourceText:
+    """The input file behind one parse's LazyText/LazyTree values, mapped on access until close()."""
+
+    def __init__(self, path: str, size: int, mtime_ns: int, encoding: Optional[str] = None):
+        self.path = path
+        self.encoding = encoding
+        self._stamp = (size, mtime_ns)
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def _read(self, start: int, end: int) -> bytes:
+        # Under the lock, so close() can't unmap the file mid-read
+        with self._lock:
+            if self._map is None:
+                with open(self.path, "rb") as f:
+                    st = os.fstat(f.fileno())
+                    if (st.st_size, st.st_mtime_ns) != self._stamp:
+                        raise SourceChanged(f"{self.path} changed after it was parsed; re-read it")
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map[start:end]
+
+    def text(self, start: int, end: int) -> str:
+        """All text inside the element at [start, end), stripped (same as the eager path)."""
+        parser = expat.ParserCreate(self.encoding)
+        parser.buffer_text = True
+        parts = []
+        parser.CharacterDataHandler = parts.append
+        parser.Parse(self._read(start, end), True)
+        return "".join(parts).strip()
+
+    def tree(self, start: int, end: int) -> ET.Element:
+        """The element at [start, end), parsed again (the tree ET.parse would have built)."""
+        parser = ET.XMLParser(target=ET.TreeBuilder(), encoding=self.encoding)
+        parser.feed(self._read(start, end))
+        return parser.close()
+
+    def close(self):
+        """Unmap the file (nothing keeps it open or locked afterwards)."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+class LazyText(Deferred):
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: SourceText, start: int, end: int):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    def resolve(self) -> str:
+        return self.source.text(self.start, self.end)
+
+    def __repr__(self) -> str:
+        return f"LazyText({os.path.basename(self.source.path)}[{self.start}:{self.end}])"
+
+
+class LazyTree(Deferred):
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: SourceText, start: int, end: int):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    def resolve(self):
+        return subtree_value(self.source.tree(self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"LazyTree({os.path.basename(self.source.path)}[{self.start}:{self.end}])"
+
+
+class TextSpans:
+    """Deferred fields of one parsed document (element -> byte span), handed to the extraction plan."""
+
+    def __init__(self, source: SourceText, spans: Dict[ET.Element, Tuple[int, int]]):
+        self.source = source
+        self._spans = spans
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def get(self, element: ET.Element) -> Optional[LazyText]:
+        span = self._spans.get(element)
+        return LazyText(self.source, span[0], span[1]) if span is not None else None
+
+    def subtree(self, element: Optional[ET.Element]) -> Optional[LazyTree]:
+        span = self._spans.get(element)
+        return LazyTree(self.source, span[0], span[1]) if span is not None else None
+
+
+# container path -> [(item pattern, deferrable text field tags, deferrable subtree field tags), ...]
+DeferrableFields = Dict[Tuple[str, ...], List[Tuple[str, FrozenSet[str], FrozenSet[str]]]]
+
+
+def deferrable_fields(plan: "ExtractionPlan") -> DeferrableFields:
+    """
+    Fields that can be deferred: plain text and subtree fields read from a direct child of
+    a list item, under a plain container path. A tag that any other rule also reads (a
+    single value, a typed/flatten field, a nested path, the other kind of field) is left
+    alone, so every rule still sees the tree it expects.
+    """
+    candidates = []
+    other_tags = set()
+    for _, selector in plan.singles:
+        other_tags.update(selector.steps)
+    for list_plan in plan.lists:
+        for field in list_plan.fields:
+            if field.kind in ('text', 'subtree') and field.datatype == 'text' and field.selector.tag is not None:
+                candidates.append((list_plan, field.selector.tag, field.kind == 'subtree'))
+                continue
+            for selector in (field.selector, *field.sub_selectors, field.fallback):
+                if selector is not None:
+                    other_tags.update(selector.steps)
+    text_tags = {tag for _, tag, tree in candidates if not tree}
+    other_tags.update(tag for _, tag, tree in candidates if tree and tag in text_tags)
+
+    targets: DeferrableFields = {}
+    for list_plan, tag, tree in candidates:
+        if list_plan.container.simple and tag not in other_tags:
+            entries = targets.setdefault(list_plan.container.steps, [])
+            for index, (pattern, texts, trees) in enumerate(entries):
+                if pattern == list_plan.item_pattern:
+                    entries[index] = (pattern, texts, trees | {tag}) if tree else (pattern, texts | {tag}, trees)
+                    break
+            else:
+                tags = frozenset((tag,))
+                entries.append((list_plan.item_pattern, frozenset(), tags) if tree else (list_plan.item_pattern, tags, frozenset()))
+    return targets
+
+
+class _Pending:
+    """A deferrable element being skipped: its start offset and just enough of its text."""
+    __slots__ = ("element", "begin", "tree", "nested", "depth", "parts", "length", "blank")
+
+    def __init__(self, element: ET.Element, begin: int, tree: bool):
+        self.element = element
+        self.begin = begin
+        self.tree = tree  # a subtree field: deferred if it has child elements, whatever its text
+        self.nested = False
+        self.depth = 0  # nested elements below it (not added to the tree)
+        self.parts: List[str] = []
+        self.length = 0
+        self.blank = True
+
+
+def _fixname(name: str) -> str:
+    # Same names as ElementTree's parser: 'uri}tag' -> '{uri}tag'
+    return "{" + name if "}" in name else name
+
+
+def parse_with_spans(path: str, targets: DeferrableFields,
+                     min_length: int = LAZY_TEXT_MIN) -> Tuple[ET.Element, TextSpans]:
+    """
+    Parse like ET.parse(path).getroot(), except for the deferrable fields (see
+    deferrable_fields) of list items: a text field whose text is at least min_length
+    characters, or a subtree field with child elements, is added to the tree empty and
+    only its byte span is kept; the others get their text as a plain leaf. Long text and
+    subtrees are never held in full, and the file is parsed from a memory map, so the
+    parse doesn't keep a copy of the file either.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+
+    builder = ET.TreeBuilder()
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.buffer_size = 1 << 16
+    spans: Dict[ET.Element, Tuple[int, int]] = {}
+    stack: List[str] = []  # tags below the document root (rule paths are relative to it)
+    pending: Optional[_Pending] = None
+    declared = {}
+
+    def start(tag, attrs):
+        nonlocal pending
+        if pending is not None:
+            pending.depth += 1
+            pending.nested = True
+            return
+        tag = _fixname(tag)
+        if attrs and any("}" in key for key in attrs):
+            attrs = {_fixname(key): value for key, value in attrs.items()}
+        element = builder.start(tag, attrs)
+        if len(stack) >= 2:
+            for pattern, texts, trees in targets.get(tuple(stack[1:-1]), ()):
+                if (tag in texts or tag in trees) and pattern in stack[-1]:
+                    pending = _Pending(element, parser.CurrentByteIndex, tag in trees)
+                    break
+        stack.append(tag)
+
+    def data(text):
+        if pending is None:
+            builder.data(text)
+            return
+        if pending.length < min_length or (pending.tree and not pending.nested):
+            pending.parts.append(text)
+        pending.length += len(text)
+        if pending.blank and text.strip():
+            pending.blank = False
+
+    def end(tag):
+        nonlocal pending
+        if pending is not None:
+            if pending.depth:
+                pending.depth -= 1
+                return
+            if pending.nested if pending.tree else (not pending.blank and pending.length >= min_length):
+                # CurrentByteIndex is at the '<' of the end tag
+                spans[pending.element] = (pending.begin, view.find(b">", parser.CurrentByteIndex) + 1)
+            elif pending.parts:
+                builder.data("".join(pending.parts))
+            pending = None
+        builder.end(_fixname(tag))
+        stack.pop()
+
+    def xml_decl(version, encoding, standalone):
+        declared["encoding"] = encoding
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    parser.XmlDeclHandler = xml_decl
+    try:
+        for offset in range(0, len(view), _CHUNK):
+            parser.Parse(view[offset:offset + _CHUNK], False)
+            profiling.check_budget("parse")
+        parser.Parse(b"", True)
+    except expat.ExpatError as e:
+        error = ET.ParseError(expat.ErrorString(e.code) + f": line {e.lineno}, column {e.offset}")
+        error.code = e.code
+        error.position = (e.lineno, e.offset)
+        raise error from None
+    finally:
+        if isinstance(view, mmap.mmap):
+            view.close()
+    root = builder.close()
+
+    source = SourceText(os.path.abspath(path), st.st_size, st.st_mtime_ns, declared.get("encoding"))
+    return root, TextSpans(source, spans)
@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from typing import Dict, Any, Optional, Tuple
+
+from adapters.input.extraction_plan import normalize_rules
+
+logger = logging.getLogger(__name__)
+
+# Bump when the normalized rules layout changes so stale entries are rebuilt
+CACHE_FORMAT = 2
+
+
+def default_cache_dir() -> str:
+    """Per-user cache folder (FG_EXPORTER_CACHE_DIR overrides)."""
+    override = os.environ.get("FG_EXPORTER_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "FGExporter", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "fg_exporter")
+
+
+class RulesCache:
+    """
+    Persistent cache of validated, normalized rules files.
+    Entries are keyed by the rules file path and stamped with its mtime and content
+    hash; a hit is a single pickle load, so repeated exports never touch YAML.
+    Validation (normalize_rules) runs only when an entry is built.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "rules")
+        # In-process layer for the GUI / batch workers that build many readers
+        self._memory: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
+
+    def load(self, rules_path: str) -> Dict[str, Any]:
+        path = os.path.abspath(rules_path)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        mtime_ns = os.stat(path).st_mtime_ns
+        digest = hashlib.sha256(raw).hexdigest()
+        key = (path, mtime_ns, digest)
+
+        rules = self._memory.get(key)
+        if rules is not None:
+            return rules
+
+        entry_path = self._entry_path(path)
+        rules = self._read_entry(entry_path, mtime_ns, digest)
+        if rules is None:
+            logger.debug(f"Rules cache miss for {path}; parsing YAML.")
+            rules = normalize_rules(self._parse_yaml(raw))
+            self._write_entry(entry_path, path, mtime_ns, digest, rules)
+
+        self._memory[key] = rules
+        return rules
+
+    def _entry_path(self, path: str) -> str:
+        name = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pickle")
+
+    @staticmethod
+    def _parse_yaml(raw: bytes) -> Any:
+        import yaml
+        # libyaml-backed loader is several times faster when PyYAML was built with it
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        return yaml.load(raw, Loader=loader)
+
+    def _read_entry(self, entry_path: str, mtime_ns: int, digest: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(entry_path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable rules cache entry {entry_path}: {e}")
+            return None
+
+        if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT:
+            return None
+        if entry.get("mtime_ns") != mtime_ns or entry.get("sha256") != digest:
+            return None
+        return entry.get("rules")
+
+    def _write_entry(self, entry_path: str, path: str, mtime_ns: int, digest: str, rules: Dict[str, Any]):
+        entry = {"format": CACHE_FORMAT, "path": path, "mtime_ns": mtime_ns, "sha256": digest, "rules": rules}
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Atomic swap so concurrent exporters never read a half-written entry
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            # The cache is an optimisation only; a read-only profile must not break exports
+            logger.debug(f"Could not write rules cache entry {entry_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+_default_cache: Optional[RulesCache] = None
+
+
+def default_rules_cache() -> RulesCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RulesCache()
+    return _default_cache
@@ -0,0 +1,130 @@
+import logging
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from core import profiling
+from core.domain import Character
+from core.records import Record
+from adapters.input.extraction_plan import ExtractionPlan, ListPlan, element_text
+
+
+class StreamIndex:
+    """
+    The parts of an ExtractionPlan that incremental parsing needs, keyed by tag path
+    (relative to the parent of the 'character' node).
+    """
+
+    def __init__(self, plan: ExtractionPlan):
+        self.plan = plan
+        self.single_paths: Dict[Tuple[str, ...], List[str]] = {}
+        for key, selector in plan.singles:
+            self.single_paths.setdefault(selector.steps, []).append(key)
+        self.containers: Dict[Tuple[str, ...], List[ListPlan]] = {}
+        for list_plan in plan.lists:
+            self.containers.setdefault(list_plan.container.steps, []).append(list_plan)
+
+        # Ancestors of any rule target must survive until the target has been seen
+        self.keep = set()
+        for path in list(self.single_paths) + list(self.containers):
+            for i in range(1, len(path)):
+                self.keep.add(path[:i])
+
+        self.supported = self._supported()
+
+    def _supported(self) -> bool:
+        selectors = [selector for _, selector in self.plan.singles] + [list_plan.container for list_plan in self.plan.lists]
+        if not all(selector.simple for selector in selectors):
+            return False
+        # A rule target nested inside another target would be cleared too early
+        paths = {selector.steps for selector in selectors}
+        for path in paths:
+            for other in paths:
+                if other != path and other[:len(path)] == path:
+                    return False
+        return True
+
+
+class StreamState:
+    """
+    Incremental rule evaluation for one character, fed iterparse start/end events.
+    Single values are captured when their element closes, list items are extracted as
+    each item closes, and consumed (or irrelevant) elements are cleared and detached
+    right away, so memory is bounded by the largest list item.
+    """
+
+    def __init__(self, index: StreamIndex, parent: ET.Element, logger: logging.Logger):
+        self.index = index
+        self.logger = logger
+        self.stack: List[ET.Element] = [parent]
+        self.path: List[str] = []
+        self.item_depth: Optional[int] = None  # depth of the list item currently being built
+        self.singles: Dict[str, Optional[str]] = {}
+        self.lists: Dict[str, List[Record]] = {list_plan.name: [] for list_plan in index.plan.lists}
+        self.seen_containers = set()
+        # Item extraction is interleaved with parsing, so rules are timed per item
+        self.profiler = profiling.active()
+
+    def start(self, elem: ET.Element, tag: Optional[str] = None):
+        # 'tag' lets a campaign record (charsheet/id-00001) stand in for 'character'
+        self.path.append(tag or elem.tag)
+        self.stack.append(elem)
+        if self.item_depth is None:
+            parent = tuple(self.path[:-1])
+            if parent in self.index.containers and parent not in self.seen_containers:
+                self.item_depth = len(self.path)
+
+    def end(self, elem: ET.Element):
+        depth = len(self.path)
+        if self.item_depth is not None and depth > self.item_depth:
+            # Still inside a list item: keep it intact until the item closes
+            self.stack.pop()
+            self.path.pop()
+            return
+
+        key = tuple(self.path)
+        if depth == self.item_depth:
+            # 1. A list item closed: run every rule sharing this container
+            for list_plan in self.index.containers[key[:-1]]:
+                if list_plan.item_pattern in elem.tag:
+                    if self.profiler is None:
+                        item_data = list_plan.extract_item(elem)
+                    else:
+                        with self.profiler.measure(profiling.RULE, list_plan.name):
+                            item_data = list_plan.extract_item(elem)
+                    if item_data is not None:
+                        self.lists[list_plan.name].append(item_data)
+            self.item_depth = None
+        elif key in self.index.single_paths:
+            # 2. Single value (first match wins, like Element.find)
+            value = element_text(elem)
+            for field_key in self.index.single_paths[key]:
+                self.singles.setdefault(field_key, value)
+        elif key in self.index.containers:
+            self.seen_containers.add(key)
+
+        self.stack.pop()
+        self.path.pop()
+        if key not in self.index.keep:
+            # Release consumed (or irrelevant) subtrees
+            elem.clear()
+            self.stack[-1].remove(elem)
+
+    def character(self) -> Character:
+        """Assemble in rule order so the result matches the DOM path exactly."""
+        character = Character()
+        for key, selector in self.index.plan.singles:
+            value = self.singles.get(key)
+            if value is not None:
+                character.add_data_point(key, value)
+            else:
+                self.logger.warning(f"Field '{key}' not found at path '{selector.path}'")
+
+        for list_plan in self.index.plan.lists:
+            if list_plan.container.steps not in self.seen_containers:
+                self.logger.warning(f"Container path '{list_plan.container.path}' not found in XML.")
+            if self.lists[list_plan.name]:
+                character.add_list(list_plan.name, self.lists[list_plan.name])
+            else:
+                self.logger.warning(f"No items found for list '{list_plan.name}' at '{list_plan.container.path}'")
+
+        return character
@@ -1,168 +1,208 @@
-import yaml
 import xml.etree.ElementTree as ET
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterator
+from core import profiling
 from core.domain import Character
+from core.records import Record
+from adapters.input.extraction_plan import ExtractionPlan, ListPlan
+from adapters.input.lazy_text import TextSpans, deferrable_fields, parse_with_spans
+from adapters.input.rules_cache import RulesCache, default_rules_cache
+from adapters.input.streaming import StreamIndex, StreamState
+
+# Campaign databases (db.xml) keep player characters under <charsheet><id-XXXXX>
+CAMPAIGN_CONTAINER = "charsheet"
+CAMPAIGN_ITEM_PATTERN = "id-"
+# The rules address a character as 'character/...'; campaign records stand in for that node
+CHARACTER_TAG = "character"
 
 class XMLReader:
-    def __init__(self, rules_path: str):
+    def __init__(self, rules_path: str, rules_cache: Optional[RulesCache] = None):
         self.logger = logging.getLogger(__name__)
         self.rules_path = rules_path
+        self.rules_cache = rules_cache or default_rules_cache()
         self.rules = self._load_rules()
+        # Compile the rules once; every parse() reuses the same selectors and field plans
+        self.plan = ExtractionPlan.compile(self.rules, normalized=True)
+        self.stream_index = StreamIndex(self.plan)
+        self.deferrable = deferrable_fields(self.plan)
 
     def _load_rules(self) -> Dict[str, Any]:
         try:
-            with open(self.rules_path, 'r') as f:
-                return yaml.safe_load(f)
+            # Validated + normalized rules; YAML is only parsed when the cache entry is stale
+            return self.rules_cache.load(self.rules_path)
         except Exception as e:
             self.logger.error(f"Failed to load rules from {self.rules_path}: {e}")
             raise
 
-    def parse(self, xml_path: str) -> Character:
+    def parse(self, xml_path: str, streaming: bool = False, lazy_text: bool = False) -> Character:
+        """
+        Extract a Character from an FGU XML export.
+        With streaming=True the file is read incrementally and consumed subtrees are
+        released as soon as their rules have run (see _parse_streaming).
+        With lazy_text=True long text fields (descriptions) and subtree fields (actions,
+        damage lists) keep only their byte span and are decoded from the file on access (see adapters.input.lazy_text); the file must
+        stay in place while the Character is used. Takes precedence over streaming.
+        """
+        if lazy_text:
+            return self._parse_lazy(xml_path)
+        if streaming:
+            return self._parse_streaming(xml_path)
+
         try:
-            tree = ET.parse(xml_path)
-            root = tree.getroot()
+            if profiling.active() is None:
+                root = ET.parse(xml_path).getroot()
+            else:
+                root = self._parse_checked(xml_path)
         except Exception as e:
             self.logger.error(f"Failed to parse XML file {xml_path}: {e}")
             raise
 
+        return self._extract(root)
+
+    @staticmethod
+    def _parse_checked(xml_path: str) -> ET.Element:
+        # ET.parse fed in 64 KiB chunks, with a memory budget check after each one
+        parser = ET.XMLParser()
+        with open(xml_path, "rb") as f:
+            while True:
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                profiling.check_budget("parse")
+        return parser.close()
+
+    def _parse_lazy(self, xml_path: str) -> Character:
+        try:
+            root, spans = parse_with_spans(xml_path, self.deferrable)
+        except Exception as e:
+            self.logger.error(f"Failed to parse XML file {xml_path}: {e}")
+            raise
+        character = self._extract(root, spans)
+        character.sources.append(spans.source)
+        return character
+
+    def _extract(self, root: ET.Element, spans: Optional[TextSpans] = None) -> Character:
         character = Character()
+        profiler = profiling.active()
 
         # 1. Process Single Values
-        single_rules = self.rules.get('single', {})
-        for key, xpath in single_rules.items():
-            value = self._get_text(root, xpath)
-            if value is not None:
-                character.add_data_point(key, value)
-            else:
-                self.logger.warning(f"Field '{key}' not found at path '{xpath}'")
+        with profiling.section(profiling.RULE, "single values"):
+            for key, selector in self.plan.singles:
+                value = selector.text(root)
+                if value is not None:
+                    character.add_data_point(key, value)
+                else:
+                    self.logger.warning(f"Field '{key}' not found at path '{selector.path}'")
 
         # 2. Process Lists
-        list_rules = self.rules.get('lists', [])
-        for rule in list_rules:
-            list_name = rule.get('name')
-            container_path = rule.get('container')
-            item_pattern = rule.get('item_pattern')
-            required_field = rule.get('required_field')
-            fields = rule.get('fields', {})
-            
-            if not all([list_name, container_path, item_pattern, fields]):
-                self.logger.warning(f"Skipping malformed list rule: {rule}")
-                continue
-
-            extracted_items = self._extract_list_items(root, container_path, item_pattern, fields, required_field)
+        for list_plan in self.plan.lists:
+            if profiler is None:
+                extracted_items = self._extract_list_items(root, list_plan, spans)
+            else:
+                with profiler.measure(profiling.RULE, list_plan.name):
+                    extracted_items = self._extract_list_items(root, list_plan, spans)
             if extracted_items:
-                character.add_list(list_name, extracted_items)
+                character.add_list(list_plan.name, extracted_items)
             else:
-                self.logger.warning(f"No items found for list '{list_name}' at '{container_path}'")
+                self.logger.warning(f"No items found for list '{list_plan.name}' at '{list_plan.container.path}'")
 
         return character
 
-    def _extract_list_items(self, root: ET.Element, container_path: str, item_pattern: str, fields: Dict[str, str], required_field: str = None) -> List[Dict[str, Any]]:
-        container = root.find(container_path)
+    def _parse_streaming(self, xml_path: str) -> Character:
+        """
+        Streaming variant of parse() built on iterparse (see StreamState).
+        Peak memory is bounded by the largest list item instead of the whole document,
+        and the resulting Character is identical to the DOM path.
+        """
+        if not self.stream_index.supported:
+            self.logger.info("Rules use XPath features or nested paths; falling back to DOM parsing.")
+            return self.parse(xml_path)
+
+        state = None
+        profiler = profiling.active()
+        try:
+            for count, (event, elem) in enumerate(ET.iterparse(xml_path, events=("start", "end")), 1):
+                if profiler is not None and not count % profiling.BUDGET_CHECK_EVERY:
+                    profiler.check("parse")
+                if state is None:
+                    # Document root: rule paths are relative to it
+                    state = StreamState(self.stream_index, elem, self.logger)
+                elif event == "start":
+                    state.start(elem)
+                elif elem is not state.stack[0]:
+                    state.end(elem)
+        except Exception as e:
+            self.logger.error(f"Failed to parse XML file {xml_path}: {e}")
+            raise
+
+        return state.character()
+
+    def iter_campaign(self, db_path: str) -> Iterator[Character]:
+        """
+        Yield every player character in a campaign database (db.xml), one at a time,
+        as each charsheet/id-XXXXX record finishes parsing. The rules apply relative to
+        each record (it stands in for 'character'), and everything outside the records is
+        discarded as it streams past, so memory stays flat and the file is read once.
+        """
+        streaming = self.stream_index.supported
+        if not streaming:
+            self.logger.info("Rules use XPath features or nested paths; extracting each record with the DOM path.")
+
+        stack: List[ET.Element] = []
+        state = None
+        record = None
+        try:
+            for event, elem in ET.iterparse(db_path, events=("start", "end")):
+                if event == "start":
+                    stack.append(elem)
+                    if record is not None:
+                        if state is not None:
+                            state.start(elem)
+                    elif len(stack) == 3 and stack[1].tag == CAMPAIGN_CONTAINER and CAMPAIGN_ITEM_PATTERN in elem.tag:
+                        record = elem
+                        if streaming:
+                            state = StreamState(self.stream_index, stack[1], self.logger)
+                            state.start(elem, tag=CHARACTER_TAG)
+                    continue
+
+                stack.pop()
+                if record is None:
+                    # Outside any record (npcs, encounters, ...): free it as it closes
+                    if stack:
+                        elem.clear()
+                        stack[-1].remove(elem)
+                    continue
+
+                if state is not None:
+                    state.end(elem)
+                if elem is record:
+                    self.logger.info(f"Extracting campaign record {CAMPAIGN_CONTAINER}/{elem.tag}")
+                    character = state.character() if state is not None else self._extract_record(elem)
+                    record = state = None
+                    elem.clear()
+                    stack[-1].remove(elem)
+                    yield character
+        except Exception as e:
+            self.logger.error(f"Failed to parse campaign file {db_path}: {e}")
+            raise
+
+    def _extract_record(self, record: ET.Element) -> Character:
+        # Re-root a campaign record as root/character so the rules resolve unchanged
+        wrapper = ET.Element("root")
+        original_tag = record.tag
+        record.tag = CHARACTER_TAG
+        wrapper.append(record)
+        try:
+            return self._extract(wrapper)
+        finally:
+            record.tag = original_tag
+
+    def _extract_list_items(self, root: ET.Element, list_plan: ListPlan,
+                            spans: Optional[TextSpans] = None) -> List[Record]:
+        container = list_plan.container.first(root)
         if container is None:
             # Graceful failure: Log warning but don't crash
-            self.logger.warning(f"Container path '{container_path}' not found in XML.")
+            self.logger.warning(f"Container path '{list_plan.container.path}' not found in XML.")
             return []
-
-        items = []
-        # Iterate over children that match the pattern (e.g., "id-")
-        for child in container:
-            if item_pattern in child.tag:
-                item_data = {}
-                # "Deep Loop": Extract multiple fields for this item
-                for field_name, field_config in fields.items():
-                    val = None
-                    
-                    # Case 1: Simple Path (String)
-                    if isinstance(field_config, str):
-                        val = self._get_text(child, field_config)
-                    
-                    # Case 2: Advanced Configuration (Dictionary)
-                    elif isinstance(field_config, dict):
-                        path = field_config.get('path')
-                        extraction_type = field_config.get('type')
-                        
-                        if extraction_type == 'flatten':
-                            # Flatten Logic: Iterate over children of the path and join sub-fields
-                            sub_container = child.find(path)
-                            if sub_container is not None:
-                                sub_fields = field_config.get('sub_fields', [])
-                                separator = field_config.get('separator', ' ') 
-                                item_separator = field_config.get('item_separator', ', ')
-                                
-                                flat_values = []
-                                for sub_item in sub_container:
-                                    # Extract components for this sub-item
-                                    components = []
-                                    for sub_field in sub_fields:
-                                        comp_val = self._get_text(sub_item, sub_field)
-                                        if comp_val:
-                                            components.append(comp_val)
-                                    
-                                    if components:
-                                        flat_values.append(separator.join(components))
-                                
-                                if flat_values:
-                                    val = item_separator.join(flat_values)
-                            else:
-                                # Fallback: If the container path doesn't exist, try a simple fallback path
-                                fallback = field_config.get('fallback_path')
-                                if fallback:
-                                    val = self._get_text(child, fallback)
-                        elif extraction_type == 'subtree':
-                            # Extract the entire subtree as a dictionary
-                            sub_node = child.find(path)
-                            if sub_node is not None:
-                                val = self._xml_to_dict(sub_node)
-                        else:
-                            # Fallback or other future types
-                            val = self._get_text(child, path)
-
-                    if val is not None and (isinstance(val, dict) or val.strip() != ""):
-                        item_data[field_name] = val
-                    else:
-                         # Optional: Log specific missing sub-fields
-                         pass 
-                
-                # Validation: Check required field if specified
-                if required_field:
-                    if required_field not in item_data or not item_data[required_field]:
-                        # Skip ghost item
-                        continue
-
-                # Only add item if we successfully extracted components
-                if item_data:
-                    items.append(item_data)
-        
-        return items
-
-    def _get_text(self, node: ET.Element, xpath: str) -> Optional[str]:
-        try:
-            found = node.find(xpath)
-            if found is not None:
-                # Use itertext() to capture text from nested tags (like <p>, <b> in formattedtext)
-                text = "".join(found.itertext())
-                return text.strip() if text else None
-        except Exception:
-            # Catch bad path errors to ensure graceful failure
-            pass
-        return None
-
-    def _xml_to_dict(self, element: ET.Element) -> Any:
-        # If element has no children, return text
-        if len(element) == 0:
-            return element.text or ""
-        
-        result = {}
-        for child in element:
-            child_val = self._xml_to_dict(child)
-            # If tag already exists, convert to list (or keep list)
-            if child.tag in result:
-                if isinstance(result[child.tag], list):
-                    result[child.tag].append(child_val)
-                else:
-                    result[child.tag] = [result[child.tag], child_val]
-            else:
-                result[child.tag] = child_val
-        return result
+        return list_plan.extract_items(container, spans)
@@ -0,0 +1,107 @@
+import logging
+import sys
+from collections.abc import Mapping
+from typing import Any, IO, Iterator, Optional, Tuple, Union
+
+from core.domain import Character
+
+logger = logging.getLogger("MarkdownStream")
+
+# Values longer than this (or spanning lines) get their own paragraph instead of a bullet
+INLINE_LIMIT = 80
+TITLE_KEYS = ("Name", "Class", "Skill")
+
+
+def _text(value: Any) -> str:
+    # Raw subtrees (damage lists, power actions...) were folded in by the enricher
+    if value is None or isinstance(value, (Mapping, list, tuple)):
+        return ""
+    return str(value).strip()
+
+
+def _split_title(item: Mapping) -> Tuple[str, list]:
+    """(title, [(key, text), ...]) for one list item; the title comes from a name-like field."""
+    fields = [(key, _text(value)) for key, value in item.items()]
+    fields = [(key, text) for key, text in fields if text]
+    for title_key in TITLE_KEYS:
+        for index, (key, text) in enumerate(fields):
+            if key == title_key:
+                return text, fields[:index] + fields[index + 1:]
+    if fields:
+        return fields[0][1], fields[1:]
+    return "", []
+
+
+def render_markdown(character: Character) -> Iterator[str]:
+    """
+    Yield the Markdown sheet in small chunks: the header, one chunk per data point block,
+    then one per list item. Nothing holds the whole document.
+    """
+    name = _text(character.data_points.get("Character Name")) or "Unnamed Character"
+    yield f"# {name}\n\n"
+
+    points = [(key, _text(value)) for key, value in character.data_points.items() if key != "Character Name"]
+    points = [(key, text) for key, text in points if text]
+    if points:
+        yield "## Overview\n\n"
+        for key, text in points:
+            yield f"- **{key}:** {text}\n"
+        yield "\n"
+
+    for list_name, items in character.lists.items():
+        if not items:
+            continue
+        yield f"## {list_name}\n\n"
+        for item in items:
+            yield _render_item(item)
+        yield "\n"
+
+
+def _render_item(item: Mapping) -> str:
+    title, fields = _split_title(item)
+    if all(len(text) <= INLINE_LIMIT and "\n" not in text for _, text in fields):
+        # Short records (skills, inventory...) stay on one line
+        details = ", ".join(f"{key}: {text}" for key, text in fields)
+        return f"- **{title}**" + (f" — {details}" if details else "") + "\n"
+
+    parts = [f"### {title}\n\n"]
+    paragraphs = []
+    for key, text in fields:
+        if len(text) > INLINE_LIMIT or "\n" in text:
+            paragraphs.append(f"**{key}:**\n\n{text}\n\n")
+        else:
+            parts.append(f"- **{key}:** {text}\n")
+    parts.append("\n")
+    parts.extend(paragraphs)
+    return "".join(parts)
+
+
+def write_markdown(character: Character, target: Union[str, IO[str]]) -> Optional[str]:
+    """
+    Stream the sheet to target: a file path, '-' for stdout, or any writable text stream.
+    Returns the path written (None for streams).
+    """
+    if target == "-":
+        _write_chunks(character, sys.stdout)
+        sys.stdout.flush()
+        return None
+    if isinstance(target, str):
+        with open(target, "w", encoding="utf-8", newline="\n") as f:
+            _write_chunks(character, f)
+        return target
+    _write_chunks(character, target)
+    return None
+
+
+def _write_chunks(character: Character, stream: IO[str]):
+    write = stream.write
+    for chunk in render_markdown(character):
+        write(chunk)
+
+
+class StreamingMarkdownWriter:
+    """Writer-compatible wrapper (write(character, path)) around the streaming renderer."""
+
+    def write(self, character: Character, output_path: Union[str, IO[str]]):
+        logger.debug(f"Streaming Markdown to {output_path if isinstance(output_path, str) else 'stream'}")
+        write_markdown(character, output_path)
@@ -0,0 +1,204 @@
+"""
+Layout pass for the PDF spellbook: every string width and line wrap is measured once
+(memoized by text, font and size), and wraps, block heights and page breaks are all
+decided before anything is drawn. Drawing then only walks the finished pages.
+
+Measurement defaults to ReportLab's stringWidth; any measure(text, font, size) function
+can be injected (benchmarks, other backends).
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+MeasureFunc = Callable[[str, str, float], float]
+
+
+def _reportlab_measure() -> MeasureFunc:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth
+
+
+class TextMeasurer:
+    """
+    Memoized string widths keyed by (text, font, size). Wrapping measures words, so a
+    spellbook's vocabulary is measured once no matter how often words repeat.
+    """
+
+    def __init__(self, measure: Optional[MeasureFunc] = None):
+        self._measure = measure or _reportlab_measure()
+        self._widths: Dict[Tuple[str, str, float], float] = {}
+        self._wraps: Dict[Tuple[str, str, float, float], List[str]] = {}
+        self.measured = 0  # calls that reached the underlying measure function
+
+    def width(self, text: str, font: str, size: float) -> float:
+        key = (text, font, size)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = self._measure(text, font, size)
+            self.measured += 1
+        return width
+
+    def wrap(self, text: str, font: str, size: float, max_width: float) -> List[str]:
+        """Greedy word wrap; paragraphs (newlines) are kept, over-long words get their own line."""
+        key = (text, font, size, max_width)
+        lines = self._wraps.get(key)
+        if lines is not None:
+            return lines
+
+        space = self.width(" ", font, size)
+        lines = []
+        for paragraph in text.split("\n"):
+            current: List[str] = []
+            current_width = 0.0
+            for word in paragraph.split():
+                word_width = self.width(word, font, size)
+                needed = word_width if not current else current_width + space + word_width
+                if current and needed > max_width:
+                    lines.append(" ".join(current))
+                    current, current_width = [word], word_width
+                else:
+                    current.append(word)
+                    current_width = needed
+            lines.append(" ".join(current))
+        self._wraps[key] = lines
+        return lines
+
+    def fit_width(self, texts: Iterable[str], font: str, size: float, minimum: float, maximum: float,
+                  padding: float = 6.0) -> float:
+        """Column width that fits the widest text (plus padding), clamped to [minimum, maximum]."""
+        widest = max((self.width(text, font, size) for text in texts), default=0.0)
+        return min(maximum, max(minimum, widest + padding))
+
+
+@dataclass
+class LayoutStyle:
+    """Fonts and metrics used by the layout pass (points)."""
+    body_font: str = "Helvetica"
+    bold_font: str = "Helvetica-Bold"
+    body_size: float = 9.0
+    leading: float = 11.0
+    header_size: float = 13.0
+    header_height: float = 22.0
+    title_size: float = 10.0
+    title_height: float = 14.0
+    block_gap: float = 6.0
+
+
+@dataclass
+class LayoutBlock:
+    """A finished block: a level header or one spell with its wrapped lines."""
+    kind: str  # "level" or "spell"
+    title: str
+    lines: List[str] = field(default_factory=list)
+    height: float = 0.0
+    y: float = 0.0  # distance from the top of the frame, set by pagination
+
+
+@dataclass
+class LayoutPage:
+    blocks: List[LayoutBlock] = field(default_factory=list)
+
+
+SPELL_DETAILS = ("School", "Cast", "Range", "Duration", "Save")
+
+
+def _level_key(spell: Mapping[str, Any]) -> int:
+    try:
+        return int(spell.get("Level") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def level_title(level: int) -> str:
+    return "Cantrips" if level == 0 else f"Level {level}"
+
+
+class SpellbookLayout:
+    """
+    Lays out spells grouped under level headers into pages of a frame_width x frame_height
+    frame. A level header always stays with the first spell below it; a spell taller than
+    a whole page is split line by line.
+    """
+
+    def __init__(self, frame_width: float, frame_height: float, style: Optional[LayoutStyle] = None,
+                 measurer: Optional[TextMeasurer] = None):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.style = style or LayoutStyle()
+        self.measurer = measurer or TextMeasurer()
+
+    def blocks(self, spells: Iterable[Mapping[str, Any]]) -> List[LayoutBlock]:
+        """Measure and wrap everything once: a header block per level, one block per spell."""
+        style = self.style
+        groups: "OrderedDict[int, List[Mapping[str, Any]]]" = OrderedDict()
+        for spell in spells:
+            groups.setdefault(_level_key(spell), []).append(spell)
+
+        blocks = []
+        for level in sorted(groups):
+            blocks.append(LayoutBlock("level", level_title(level), height=style.header_height))
+            for spell in groups[level]:
+                details = " | ".join(str(spell.get(key)) for key in SPELL_DETAILS if spell.get(key))
+                lines = []
+                if details:
+                    lines.extend(self.measurer.wrap(details, style.body_font, style.body_size, self.frame_width))
+                description = spell.get("Description")
+                if isinstance(description, str) and description.strip():
+                    lines.extend(self.measurer.wrap(description.strip(), style.body_font, style.body_size, self.frame_width))
+                height = style.title_height + len(lines) * style.leading + style.block_gap
+                blocks.append(LayoutBlock("spell", str(spell.get("Name") or ""), lines, height))
+        return blocks
+
+    def paginate(self, blocks: List[LayoutBlock]) -> List[LayoutPage]:
+        """Assign blocks to pages in one pass (top-down y positions)."""
+        pages = [LayoutPage()]
+        used = 0.0
+        index = 0
+        while index < len(blocks):
+            block = blocks[index]
+            needed = block.height
+            if block.kind == "level" and index + 1 < len(blocks):
+                # Keep the header with its first spell (or at least its title and a line)
+                follower = blocks[index + 1]
+                needed += min(follower.height, self.style.title_height + self.style.leading)
+            if used > 0 and used + needed > self.frame_height:
+                pages.append(LayoutPage())
+                used = 0.0
+            if block.height > self.frame_height - used and block.lines:
+                # Taller than what's left of an empty page: split by lines
+                head, rest = self._split(block, self.frame_height - used)
+                head.y = used
+                pages[-1].blocks.append(head)
+                if rest is None:
+                    # Not even one line fits beside the title: let it overflow rather
+                    # than leave an empty "(cont.)" block
+                    used += head.height
+                    index += 1
+                    continue
+                pages.append(LayoutPage())
+                used = 0.0
+                blocks[index] = rest
+                continue
+            block.y = used
+            pages[-1].blocks.append(block)
+            used += block.height
+            index += 1
+        return pages
+
+    def _split(self, block: LayoutBlock, available: float) -> Tuple[LayoutBlock, Optional[LayoutBlock]]:
+        """(lines that fit in available, the rest as a "(cont.)" block or None if nothing is left)."""
+        style = self.style
+        fit = max(1, int((available - style.title_height - style.block_gap) // style.leading))
+        head_lines = block.lines[:fit]
+        head = LayoutBlock(block.kind, block.title, head_lines,
+                           style.title_height + len(head_lines) * style.leading + style.block_gap)
+        rest_lines = block.lines[fit:]
+        if not rest_lines:
+            return head, None
+        title = block.title if block.title.endswith(" (cont.)") else f"{block.title} (cont.)"
+        rest = LayoutBlock(block.kind, title, rest_lines,
+                           style.title_height + len(rest_lines) * style.leading + style.block_gap)
+        return head, rest
+
+    def layout(self, spells: Iterable[Mapping[str, Any]]) -> List[LayoutPage]:
+        return self.paginate(self.blocks(spells))
@@ -0,0 +1,139 @@
+"""
+Process-wide ReportLab resources for the PDF sheet.
+
+- Fonts and paragraph styles are built once per process (module-level caches), so a
+  batch worker or the GUI writing many characters pays the setup cost once.
+- Static sheet chrome (page border, header band, labelled boxes, footer rule) is drawn
+  once per document as a form XObject and referenced on every page with doForm(), so
+  a 20-page spellbook stores those drawing operators once instead of 20 times.
+
+Used by the spellbook writer (adapters.output.spellbook_pdf), or from a platypus
+document's page callbacks:
+
+    chrome = sheet_chrome(A4)
+    doc.build(story, onFirstPage=chrome.on_page, onLaterPages=chrome.on_page)
+"""
+import logging
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+logger = logging.getLogger("PDFResources")
+
+BASE_FONT = "Helvetica"
+BOLD_FONT = "Helvetica-Bold"
+
+# font name -> registered name (the fallback when the TTF can't be loaded)
+_fonts: Dict[str, str] = {}
+
+
+def register_font(name: str, path: str, fallback: str = BASE_FONT) -> str:
+    """Register a TTF once per process; returns the usable font name."""
+    if name in _fonts:
+        return _fonts[name]
+    try:
+        pdfmetrics.registerFont(TTFont(name, path))
+        _fonts[name] = name
+    except Exception as e:
+        logger.warning(f"Font '{name}' could not be loaded from {path} ({e}); using {fallback}")
+        _fonts[name] = fallback
+    return _fonts[name]
+
+
+def sheet_fonts(font_dir: Optional[str] = None) -> Tuple[str, str]:
+    """(body font, bold font): bundled TTFs when present, the PDF base fonts otherwise."""
+    if font_dir is None:
+        return BASE_FONT, BOLD_FONT
+    return (register_font("SheetSans", os.path.join(font_dir, "DejaVuSans.ttf")),
+            register_font("SheetSans-Bold", os.path.join(font_dir, "DejaVuSans-Bold.ttf"), BOLD_FONT))
+
+
+@lru_cache(maxsize=None)
+def sheet_styles(font_dir: Optional[str] = None) -> Dict[str, ParagraphStyle]:
+    """
+    Paragraph styles for the sheet, built once per font set. Callers must not modify the
+    returned styles; derive a new one with ParagraphStyle(name, parent=...) instead.
+    """
+    body_font, bold_font = sheet_fonts(font_dir)
+    base = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle("SheetTitle", parent=base["Title"], fontName=bold_font, fontSize=20, spaceAfter=6),
+        "section": ParagraphStyle("SheetSection", parent=base["Heading2"], fontName=bold_font, fontSize=13,
+                                  textColor=colors.HexColor("#3a3a3a"), spaceBefore=8, spaceAfter=4),
+        "item": ParagraphStyle("SheetItem", parent=base["Heading4"], fontName=bold_font, fontSize=10, spaceBefore=4),
+        "body": ParagraphStyle("SheetBody", parent=base["BodyText"], fontName=body_font, fontSize=9, leading=11),
+        "label": ParagraphStyle("SheetLabel", parent=base["BodyText"], fontName=body_font, fontSize=7,
+                                textColor=colors.grey, leading=8),
+    }
+
+
+@dataclass
+class ChromeBox:
+    """A labelled, outlined box of the static sheet (positions in points from the bottom left)."""
+    x: float
+    y: float
+    width: float
+    height: float
+    label: str = ""
+
+
+@dataclass
+class SheetChrome:
+    """
+    The static drawing shared by every page. Drawn into a form XObject the first time a
+    document needs it; every page after that is a single doForm() reference.
+    """
+    page_size: Tuple[float, float]
+    title: str = "Fantasy Grounds Character Sheet"
+    margin: float = 28.0
+    boxes: List[ChromeBox] = field(default_factory=list)
+    name: str = "SheetChrome"
+
+    def on_page(self, canvas, doc=None):
+        """onFirstPage/onLaterPages callback for SimpleDocTemplate.build()."""
+        if not canvas.hasForm(self.name):
+            canvas.beginForm(self.name)
+            self.draw(canvas)
+            canvas.endForm()
+        canvas.doForm(self.name)
+
+    def draw(self, canvas):
+        """The actual drawing; also usable directly when forms aren't wanted."""
+        width, height = self.page_size
+        m = self.margin
+        body_font, bold_font = sheet_fonts()
+        canvas.saveState()
+        canvas.setStrokeColor(colors.HexColor("#9a9a9a"))
+        canvas.setLineWidth(0.8)
+        canvas.rect(m, m, width - 2 * m, height - 2 * m)
+
+        # Header band
+        canvas.setFillColor(colors.HexColor("#2b2b2b"))
+        canvas.rect(m, height - m - 22, width - 2 * m, 22, stroke=0, fill=1)
+        canvas.setFillColor(colors.white)
+        canvas.setFont(bold_font, 10)
+        canvas.drawString(m + 8, height - m - 15, self.title)
+
+        # Labelled boxes
+        canvas.setFillColor(colors.grey)
+        canvas.setFont(body_font, 6.5)
+        for box in self.boxes:
+            canvas.roundRect(box.x, box.y, box.width, box.height, 3)
+            if box.label:
+                canvas.drawString(box.x + 3, box.y + box.height - 8, box.label.upper())
+
+        # Footer rule
+        canvas.line(m, m + 14, width - m, m + 14)
+        canvas.restoreState()
+
+
+@lru_cache(maxsize=None)
+def sheet_chrome(page_size: Tuple[float, float], title: str = "Fantasy Grounds Character Sheet") -> SheetChrome:
+    """One SheetChrome per page size/title for the whole process (the form itself is per document)."""
+    return SheetChrome(tuple(page_size), title)
@@ -0,0 +1,86 @@
+"""
+Spellbook PDF ('spellbook.pdf' format): the character's spells under level headers, on
+the shared sheet chrome.
+
+Every wrap and page break comes from the layout pass (pdf_layout.SpellbookLayout) before
+the first page is drawn; the static chrome is one form XObject per document and fonts
+are set up once per process (pdf_resources).
+"""
+import logging
+from typing import Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen.canvas import Canvas
+
+from adapters.output.pdf_layout import LayoutPage, LayoutStyle, SpellbookLayout, TextMeasurer
+from adapters.output.pdf_resources import sheet_chrome, sheet_fonts
+from core.domain import Character
+
+logger = logging.getLogger("SpellbookPDF")
+
+SPELL_LIST = "Spells & Powers"
+# Space kept clear of the chrome: page margin, header band and footer rule
+MARGIN = 28.0
+PADDING = 8.0
+HEADER_BAND = 22.0
+FOOTER_RULE = 14.0
+
+
+class SpellbookPDFWriter:
+    """Writer-compatible (write(character, path)) spellbook renderer."""
+
+    def __init__(self, page_size: Tuple[float, float] = A4):
+        self.page_size = tuple(page_size)
+        body_font, bold_font = sheet_fonts()
+        self.style = LayoutStyle(body_font=body_font, bold_font=bold_font)
+        width, height = self.page_size
+        self.left = MARGIN + PADDING
+        self.top = height - MARGIN - HEADER_BAND - PADDING
+        self.frame_width = width - 2 * (MARGIN + PADDING)
+        self.frame_height = self.top - (MARGIN + FOOTER_RULE + PADDING)
+
+    def write(self, character: Character, output_path: str):
+        spells = character.lists.get(SPELL_LIST) or []
+        name = character.data_points.get("Character Name") or "Unnamed Character"
+        # A measurer per document: its wrap memo holds whole descriptions
+        layout = SpellbookLayout(self.frame_width, self.frame_height, self.style, TextMeasurer())
+        pages = layout.layout(spells) if spells else [LayoutPage()]
+        logger.debug(f"Spellbook for '{name}': {len(spells)} spells on {len(pages)} page(s)")
+
+        chrome = sheet_chrome(self.page_size)
+        canvas = Canvas(output_path, pagesize=self.page_size)
+        canvas.setTitle(f"{name} - Spellbook")
+        for number, page in enumerate(pages, 1):
+            chrome.on_page(canvas)
+            self._draw_page(canvas, page, name, number, len(pages))
+            canvas.showPage()
+        canvas.save()
+
+    def _draw_page(self, canvas, page: LayoutPage, name: str, number: int, total: int):
+        style = self.style
+        canvas.setFillColor(colors.grey)
+        canvas.setFont(style.body_font, 7)
+        canvas.drawRightString(self.left + self.frame_width, MARGIN + 4, f"{name} - page {number}/{total}")
+        if not page.blocks:
+            canvas.setFillColor(colors.black)
+            canvas.setFont(style.body_font, style.body_size)
+            canvas.drawString(self.left, self.top - style.leading, "No spells.")
+            return
+
+        for block in page.blocks:
+            y = self.top - block.y
+            if block.kind == "level":
+                canvas.setFillColor(colors.HexColor("#3a3a3a"))
+                canvas.setFont(style.bold_font, style.header_size)
+                canvas.drawString(self.left, y - style.header_size - 2, block.title)
+                continue
+            canvas.setFillColor(colors.black)
+            canvas.setFont(style.bold_font, style.title_size)
+            canvas.drawString(self.left, y - style.title_size, block.title)
+            if block.lines:
+                text = canvas.beginText(self.left, y - style.title_height - style.body_size)
+                text.setFont(style.body_font, style.body_size, style.leading)
+                for line in block.lines:
+                    text.textLine(line)
+                canvas.drawText(text)
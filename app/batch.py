@@ -0,0 +1,185 @@
+import glob
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from app.export_cache import ExportCache
+from app.pipeline import ExportPipeline, ExportResult
+
+logger = logging.getLogger("Batch")
+
+# One pipeline per worker process: rules, enricher and writers are loaded once
+_worker_pipeline: Optional[ExportPipeline] = None
+
+
+def collect_inputs(sources: List[str]) -> List[str]:
+    """
+    Expand batch sources into XML paths. Each source may be a directory (its *.xml files),
+    a glob pattern, or a list file ('@roster.txt' or any *.txt: one path per line, '#' comments).
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, "*.xml"))))
+        elif source.startswith("@") or (source.lower().endswith(".txt") and os.path.isfile(source)):
+            list_file = source[1:] if source.startswith("@") else source
+            base_dir = os.path.dirname(os.path.abspath(list_file))
+            with open(list_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        paths.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+        else:
+            matches = sorted(glob.glob(source, recursive=True))
+            if not matches and os.path.isfile(source):
+                matches = [source]
+            paths.extend(matches)
+
+    # De-duplicate while keeping order
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_outputs(paths: List[str], output_dir: str) -> List[Tuple[str, str]]:
+    """Pair each input with an output base path, disambiguating repeated file names."""
+    used = {}
+    jobs = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = used.get(stem.lower(), 0) + 1
+        used[stem.lower()] = count
+        name = stem if count == 1 else f"{stem}_{count}"
+        jobs.append((path, os.path.join(output_dir, name)))
+    return jobs
+
+
+def _init_worker(rules_path: str, enricher_name: str, streaming: bool, log_level: int, use_cache: bool, rebuild: bool,
+                 memory_budget: Optional[int] = None, lazy_text: bool = False):
+    global _worker_pipeline
+    logging.basicConfig(level=log_level, format='%(levelname)s: %(message)s')
+    cache = ExportCache(refresh=rebuild) if use_cache else None
+    _worker_pipeline = ExportPipeline(rules_path, enricher_name, streaming=streaming, cache=cache,
+                                      memory_budget=memory_budget, lazy_text=lazy_text)
+
+
+def _export_in_worker(input_path: str, base_output: str, fmt: str) -> ExportResult:
+    return _worker_pipeline.export(input_path, base_output, fmt)
+
+
+def run_batch(sources: List[str], output_dir: str, rules_path: str, enricher_name: str = "dnd5e",
+              fmt: str = "both", jobs: Optional[int] = None, streaming: bool = False,
+              use_cache: bool = True, rebuild: bool = False, memory_budget: Optional[int] = None,
+              lazy_text: bool = False) -> int:
+    """
+    Export every input matched by sources into output_dir over a process pool.
+    Logs a per-file summary and returns the process exit code (0 = all succeeded).
+    A file over memory_budget (bytes) fails on its own; its worker carries on.
+    """
+    paths = collect_inputs(sources)
+    if not paths:
+        logger.error(f"No XML files found for batch input: {', '.join(sources)}")
+        return 2
+
+    os.makedirs(output_dir, exist_ok=True)
+    work = plan_outputs(paths, output_dir)
+    workers = max(1, min(jobs or available_cores(), len(work)))
+    logger.info(f"Batch exporting {len(work)} file(s) with {workers} worker(s)...")
+
+    start = time.perf_counter()
+    results = {}
+    init_args = (rules_path, enricher_name, streaming, logging.getLogger().level, use_cache, rebuild, memory_budget,
+                 lazy_text)
+    if workers == 1:
+        # No pool overhead for a single worker
+        _init_worker(*init_args)
+        for index, (path, base_output) in enumerate(work, 1):
+            results[path] = _export_in_worker(path, base_output, fmt)
+            _log_progress(index, len(work), results[path])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            futures = {pool.submit(_export_in_worker, path, base_output, fmt): path for path, base_output in work}
+            for index, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    # A worker process that dies breaks the pool: this file and every one
+                    # still pending fail (BrokenProcessPool); the summary lists them all
+                    results[path] = ExportResult(input_path=path, errors={"worker": f"{type(e).__name__}: {e}"})
+                _log_progress(index, len(work), results[path])
+    elapsed = time.perf_counter() - start
+
+    return _log_summary([results[path] for path, _ in work], elapsed)
+
+
+def run_campaign(db_path: str, output_dir: str, rules_path: str, enricher_name: str = "dnd5e", fmt: str = "both",
+                 memory_budget: Optional[int] = None) -> int:
+    """
+    Export every player character in a campaign db.xml in a single streaming read.
+    Outputs are named after the characters. Returns the process exit code.
+    Records are always rendered: they have no file of their own for the export cache
+    (or lazy text) to key on.
+    """
+    pipeline = ExportPipeline(rules_path, enricher_name, memory_budget=memory_budget)
+    os.makedirs(output_dir, exist_ok=True)
+    used = {}
+    results = []
+    start = time.perf_counter()
+    try:
+        for index, character in enumerate(pipeline.reader.iter_campaign(db_path), 1):
+            name = character.data_points.get("Character Name") or f"character_{index}"
+            stem = re.sub(r'[<>:"/\\|?*]+', "_", name).strip() or f"character_{index}"
+            count = used.get(stem.lower(), 0) + 1
+            used[stem.lower()] = count
+            if count > 1:
+                stem = f"{stem}_{count}"
+            result = pipeline.export_character(character, os.path.join(output_dir, stem), fmt, label=name)
+            _log_progress(index, None, result)
+            results.append(result)
+    except Exception as e:
+        logger.error(f"Campaign export aborted: {e}")
+        results.append(ExportResult(input_path=db_path, errors={"read": f"{type(e).__name__}: {e}"}))
+
+    if not results:
+        logger.error(f"No characters found in campaign file: {db_path}")
+        return 2
+    return _log_summary(results, time.perf_counter() - start)
+
+
+def _log_summary(results: List[ExportResult], elapsed: float) -> int:
+    failed = [result for result in results if not result.ok]
+    logger.info("--- Batch Summary ---")
+    for result in results:
+        name = os.path.basename(result.input_path)
+        if result.ok:
+            logger.info(f"OK    {name} -> {', '.join(os.path.basename(o) for o in result.outputs)} ({result.seconds:.2f}s)")
+        else:
+            details = "; ".join(f"{stage}: {msg}" for stage, msg in result.errors.items())
+            logger.error(f"FAIL  {name}: {details}")
+    logger.info(f"Batch complete: {len(results) - len(failed)} succeeded, {len(failed)} failed in {elapsed:.2f}s")
+    hits = sum(result.cache_hits for result in results)
+    misses = sum(result.cache_misses for result in results)
+    if hits or misses:
+        logger.info(f"Export cache: {hits} hit(s), {misses} miss(es)")
+    return 1 if failed else 0
+
+
+def _log_progress(index: int, total: Optional[int], result: ExportResult):
+    status = "done" if result.ok else "FAILED"
+    logger.info(f"[{index}/{total or '?'}] {os.path.basename(result.input_path)} {status}")
@@ -0,0 +1,107 @@
+import hashlib
+import importlib.util
+import logging
+import os
+import shutil
+import sys
+from typing import Optional
+
+from adapters.input.rules_cache import default_cache_dir
+
+logger = logging.getLogger("ExportCache")
+
+# Bump to invalidate every stored artifact (e.g. after changing the key layout)
+CACHE_FORMAT = 1
+
+# Writer module per output format; its file stamp is part of the key so a new writer
+# (or a new release of the exe) never serves stale layouts
+WRITER_MODULES = {
+    "md": "adapters.output.markdown_writer",
+    "pdf": "adapters.output.pdf_writer",
+    "spellbook.pdf": "adapters.output.spellbook_pdf",
+}
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def writer_stamp(fmt: str) -> str:
+    """Cheap fingerprint of the writer code without importing it (ReportLab stays unloaded)."""
+    origin = None
+    module = WRITER_MODULES.get(fmt)
+    if module:
+        try:
+            spec = importlib.util.find_spec(module)
+            origin = spec.origin if spec else None
+        except (ImportError, ValueError):
+            origin = None
+    if not origin or not os.path.exists(origin):
+        # Frozen builds: fall back to the executable itself
+        origin = sys.executable
+    st = os.stat(origin)
+    return f"{fmt}:{st.st_size}:{st.st_mtime_ns}"
+
+
+class ExportCache:
+    """
+    Content-addressed store of rendered outputs.
+    The key covers the input XML bytes, the rules file, the enricher name/version,
+    the output format and the writer code, so an unchanged character is copied
+    into place instead of being parsed, enriched and rendered again.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, refresh: bool = False):
+        self.root = os.path.join(cache_dir or default_cache_dir(), "exports")
+        # refresh=True: never serve hits, but still store fresh artifacts (force rebuild)
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, input_digest: str, context_digest: str, fmt: str) -> str:
+        material = f"{CACHE_FORMAT}|{input_digest}|{context_digest}|{writer_stamp(fmt)}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _artifact_path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{fmt}")
+
+    def fetch(self, key: str, fmt: str, dest: str) -> bool:
+        """Copy a cached artifact to dest. Returns False (a miss) if there is none."""
+        artifact = self._artifact_path(key, fmt)
+        if self.refresh or not os.path.exists(artifact):
+            self.misses += 1
+            return False
+        try:
+            dest_dir = os.path.dirname(dest)
+            if dest_dir:
+                os.makedirs(dest_dir, exist_ok=True)
+            # Copy rather than hard-link: a later export writing to dest must not alter the cache
+            shutil.copyfile(artifact, dest)
+        except OSError as e:
+            logger.debug(f"Could not restore cached artifact {artifact}: {e}")
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key: str, fmt: str, src: str):
+        artifact = self._artifact_path(key, fmt)
+        tmp_path = f"{artifact}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(artifact), exist_ok=True)
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, artifact)
+        except OSError as e:
+            # The cache is an optimisation only
+            logger.debug(f"Could not store {src} in export cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def stats_line(self) -> str:
+        return f"Export cache: {self.hits} hit(s), {self.misses} miss(es)"
@@ -0,0 +1,171 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.export_cache import ExportCache
+from app.pipeline import ExportCancelled, ExportPipeline, ExportResult
+
+logger = logging.getLogger("ExportWorker")
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_job_ids = itertools.count(1)
+
+
+@dataclass
+class ExportJob:
+    """
+    One queued export. stage is the pipeline stage currently running ('parse', 'write pdf', ...).
+    output_path, if set, is the file name picked by the user for a single-format export;
+    the produced <base_output>.<fmt> is renamed to it.
+    """
+    input_path: str
+    base_output: str
+    fmt: str
+    rules_path: str
+    enricher_name: str = "dnd5e"
+    rebuild: bool = False
+    profile: bool = False
+    output_path: Optional[str] = None
+    id: int = field(default_factory=lambda: next(_job_ids))
+    status: str = QUEUED
+    stage: str = ""
+    result: Optional[ExportResult] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        """Queued jobs are dropped; a running job stops at its next stage boundary."""
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+
+class ExportWorker:
+    """
+    Long-lived background thread running ExportJobs one at a time from a queue.
+    Pipelines (compiled rules, enricher, loaded writers) stay warm between jobs, one per
+    rules file/enricher pair, and each keeps the last few enriched Characters so exporting
+    the same file in another format only runs the writer.
+    on_update(job) is called from the worker thread whenever a job changes state or stage.
+    """
+
+    def __init__(self, on_update: Optional[Callable[[ExportJob], None]] = None, keep_enriched: int = 4):
+        self.on_update = on_update
+        self.keep_enriched = keep_enriched
+        self.jobs: List[ExportJob] = []
+        self._queue: "queue.Queue[Optional[ExportJob]]" = queue.Queue()
+        # (rules path, rules mtime, enricher) -> pipeline
+        self._pipelines: Dict[Tuple[str, int, str], ExportPipeline] = {}
+        self._thread = threading.Thread(target=self._run, name="ExportWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: ExportJob) -> ExportJob:
+        self.jobs.append(job)
+        self._queue.put(job)
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id: int):
+        for job in self.jobs:
+            if job.id == job_id and not job.finished:
+                job.cancel()
+
+    def cancel_all(self):
+        for job in self.jobs:
+            if not job.finished:
+                job.cancel()
+
+    def forget_finished(self) -> List[ExportJob]:
+        """Drop finished jobs from the list; returns them."""
+        finished = [job for job in self.jobs if job.finished]
+        self.jobs = [job for job in self.jobs if not job.finished]
+        return finished
+
+    def pending(self) -> int:
+        return sum(1 for job in self.jobs if not job.finished)
+
+    def shutdown(self, wait: bool = False):
+        self.cancel_all()
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _notify(self, job: ExportJob):
+        if self.on_update is not None:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                logger.debug(f"Job update callback failed: {e}")
+
+    def _pipeline(self, job: ExportJob) -> ExportPipeline:
+        # A rules file edited while the app is open gets a fresh pipeline
+        key = (os.path.abspath(job.rules_path), os.stat(job.rules_path).st_mtime_ns, (job.enricher_name or "none").lower())
+        pipeline = self._pipelines.get(key)
+        if pipeline is None:
+            for stale in [k for k in self._pipelines if k[0] == key[0] and k[2] == key[2]]:
+                del self._pipelines[stale]
+            logger.info(f"Loading rules: {os.path.basename(job.rules_path)}")
+            pipeline = ExportPipeline(job.rules_path, job.enricher_name, cache=ExportCache(),
+                                      keep_enriched=self.keep_enriched)
+            self._pipelines[key] = pipeline
+        return pipeline
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancel_requested:
+                job.status = CANCELLED
+                self._notify(job)
+                continue
+            job.status = RUNNING
+            self._notify(job)
+            try:
+                self._execute(job)
+            except Exception as e:
+                job.result = ExportResult(input_path=job.input_path, errors={"worker": f"{type(e).__name__}: {e}"})
+                job.status = FAILED
+            self._notify(job)
+
+    def _execute(self, job: ExportJob):
+        def progress(stage: str):
+            if job.cancel_requested:
+                raise ExportCancelled()
+            job.stage = stage
+            self._notify(job)
+
+        pipeline = self._pipeline(job)
+        # A profile of a cache hit measures nothing: profiling always regenerates
+        pipeline.cache.refresh = job.rebuild or job.profile
+        logger.info(f"--- Job {job.id}: {os.path.basename(job.input_path)} -> {job.fmt.upper()} ---")
+        if job.profile:
+            result = pipeline.export_profiled(job.input_path, job.base_output, job.fmt, progress=progress)
+        else:
+            result = pipeline.export(job.input_path, job.base_output, job.fmt, progress=progress)
+
+        # The dialog may have chosen a different extension; keep the user's file name
+        produced = f"{job.base_output}.{job.fmt}"
+        if job.output_path and produced in result.outputs and os.path.normcase(produced) != os.path.normcase(job.output_path):
+            os.replace(produced, job.output_path)
+            result.outputs[result.outputs.index(produced)] = job.output_path
+
+        logger.info(pipeline.cache.stats_line())
+        job.result = result
+        job.stage = ""
+        job.status = CANCELLED if result.cancelled else DONE if result.ok else FAILED
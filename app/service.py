@@ -0,0 +1,302 @@
+import base64
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from app.batch import available_cores
+from app.export_cache import ExportCache
+from app.pipeline import WRITER_LOADERS, ExportPipeline
+
+logger = logging.getLogger("Service")
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+CONTENT_TYPES = {"md": "text/markdown; charset=utf-8", "pdf": "application/pdf", "spellbook.pdf": "application/pdf",
+                 "json": "application/json", "html": "text/html; charset=utf-8"}
+
+# One warm pipeline per worker (process, or the service thread with a single worker)
+_worker_pipeline: Optional[ExportPipeline] = None
+
+
+def _init_worker(rules_path: str, enricher_name: str, log_level: int, use_cache: bool, memory_budget: Optional[int]):
+    global _worker_pipeline
+    logging.basicConfig(level=log_level, format='%(levelname)s: %(message)s')
+    cache = ExportCache() if use_cache else None
+    _worker_pipeline = ExportPipeline(rules_path, enricher_name, cache=cache, memory_budget=memory_budget)
+    # Import writers now rather than on the first request
+    _worker_pipeline.preload_writers(list(WRITER_LOADERS))
+
+
+def _render_in_worker(xml: bytes, fmt: str) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """(rendered bytes, errors) for one request."""
+    with tempfile.TemporaryDirectory(prefix="fg_service_") as workdir:
+        input_path = os.path.join(workdir, "character.xml")
+        with open(input_path, "wb") as f:
+            f.write(xml)
+        base_output = os.path.join(workdir, "character")
+        result = _worker_pipeline.export(input_path, base_output, fmt)
+        if not result.ok:
+            return None, result.errors
+        with open(f"{base_output}.{fmt}", "rb") as f:
+            return f.read(), {}
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class ExportService:
+    """
+    Long-running exporter: rules, enricher and writers stay loaded in a bounded pool of
+    workers, so a request only pays for parse/enrich/render. One worker runs in-process;
+    more workers are processes (true parallelism). A worker process that dies breaks the
+    whole pool: it is replaced with a fresh one, and each request that was running on
+    it is retried once in a worker of its own, so only the request that kills its
+    worker fails.
+    At most workers + backlog requests are accepted at once; the rest get ServiceBusy.
+    """
+
+    def __init__(self, rules_path: str, enricher_name: str = "dnd5e", workers: Optional[int] = None,
+                 backlog: Optional[int] = None, use_cache: bool = True, memory_budget: Optional[int] = None):
+        self.workers = max(1, workers or available_cores())
+        self.backlog = self.workers * 4 if backlog is None else backlog
+        self._init_args = (rules_path, enricher_name, logging.getLogger().level, use_cache, memory_budget)
+        self._executor_lock = threading.Lock()
+        self.executor = self._start_executor()
+        self._slots = threading.BoundedSemaphore(self.workers + self.backlog)
+
+    def _start_executor(self) -> Executor:
+        if self.workers == 1:
+            executor: Executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=self._init_args)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=self._init_args)
+        # Start every worker now so the first requests don't pay for setup
+        for _ in range(self.workers):
+            executor.submit(int)
+        return executor
+
+    def _restart_executor(self, broken: Executor):
+        with self._executor_lock:
+            if self.executor is broken:  # not already replaced by another request
+                logger.warning("A worker process died; restarting the worker pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._start_executor()
+
+    def render(self, xml: bytes, fmt: str, wait: bool = False) -> Tuple[Optional[bytes], Dict[str, str]]:
+        fmt = fmt.lower()
+        if fmt not in WRITER_LOADERS:
+            return None, {"request": f"Unknown format '{fmt}' (available: {', '.join(WRITER_LOADERS)})"}
+        if not self._slots.acquire(blocking=wait):
+            raise ServiceBusy(f"All {self.workers} worker(s) busy and the backlog is full")
+        try:
+            executor = self.executor
+            try:
+                return executor.submit(_render_in_worker, xml, fmt).result()
+            except BrokenProcessPool:
+                self._restart_executor(executor)
+                return self._render_isolated(xml, fmt)
+        except Exception as e:
+            return None, {"worker": f"{type(e).__name__}: {e}"}
+        finally:
+            self._slots.release()
+
+    def _render_isolated(self, xml: bytes, fmt: str) -> Tuple[Optional[bytes], Dict[str, str]]:
+        # Every request that was on the dead pool ends up here, each in its own process,
+        # so the one that crashed can't take the others down again
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=self._init_args) as executor:
+            try:
+                return executor.submit(_render_in_worker, xml, fmt).result()
+            except BrokenProcessPool as e:
+                return None, {"worker": f"Worker process died on this request ({e})"}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """POST /export?format=pdf with the character XML as body; GET /health."""
+    service: ExportService = None
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._reply(200, json.dumps({"status": "ok", "workers": self.service.workers,
+                                         "formats": list(WRITER_LOADERS)}).encode("utf-8"), "application/json")
+        else:
+            self._error(404, "Not found")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/export":
+            return self._error(404, "Not found")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return self._error(400, "Request body must be the character XML")
+        if length > MAX_REQUEST_BYTES:
+            return self._error(413, f"Request larger than {MAX_REQUEST_BYTES // (1024 * 1024)} MiB")
+        fmt = parse_qs(url.query).get("format", ["pdf"])[0].lower()
+        xml = self.rfile.read(length)
+        try:
+            data, errors = self.service.render(xml, fmt)
+        except ServiceBusy as e:
+            return self._error(503, str(e))
+        if errors:
+            return self._error(400 if "request" in errors else 422, "; ".join(f"{k}: {v}" for k, v in errors.items()))
+        self._reply(200, data, CONTENT_TYPES.get(fmt, "application/octet-stream"))
+
+    def _error(self, status: int, message: str):
+        self._reply(status, json.dumps({"error": message}).encode("utf-8"), "application/json")
+
+    def _reply(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+if hasattr(socket, "AF_UNIX"):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:  # e.g. Windows builds without AF_UNIX
+    _UnixHTTPServer = None
+
+
+def _remove_socket(path: str) -> bool:
+    """Unlink path if it's a socket (e.g. left by an earlier run); False if something else is there."""
+    try:
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            return False
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def _check_socket_path(path: str):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} exists and is not a socket; pick another path for unix:")
+
+
+def parse_address(address: str):
+    """'unix:/path.sock' -> the socket path, 'host:port' -> (host, port); ValueError if unusable here."""
+    if address.startswith("unix:"):
+        if _UnixHTTPServer is None:
+            raise ValueError(f"Unix sockets are not supported on this platform; serve on HOST:PORT instead of {address}")
+        path = address[len("unix:"):]
+        _check_socket_path(path)
+        return path
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Invalid service address '{address}' (expected HOST:PORT or unix:/path.sock)")
+    return host or "127.0.0.1", int(port)
+
+
+def serve_http(service: ExportService, address: str = DEFAULT_ADDRESS):
+    """Serve until Ctrl+C on 'host:port' (localhost by default) or 'unix:/path/to.sock' (see parse_address)."""
+    handler = type("ExportHandler", (_Handler,), {"service": service})
+    try:
+        listen = parse_address(address)
+        if isinstance(listen, str):
+            if not _remove_socket(listen):  # a stale socket from an earlier run
+                raise ValueError(f"{listen} exists and is not a socket; pick another path for unix:")
+            server = _UnixHTTPServer(listen, handler)
+        else:
+            server = ThreadingHTTPServer(listen, handler)
+            server.daemon_threads = True
+    except Exception:
+        service.shutdown()
+        raise
+    logger.info(f"Export service listening on {address} with {service.workers} worker(s) "
+                f"(POST /export?format=pdf, GET /health; Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Service stopped.")
+    finally:
+        server.server_close()
+        if server.address_family == getattr(socket, "AF_UNIX", None):
+            _remove_socket(listen)
+        service.shutdown()
+
+
+def serve_stdio(service: ExportService, stdin=None, stdout=None):
+    """
+    JSON-lines protocol: one request per input line,
+        {"id": 1, "format": "md", "xml": "<root>...</root>"}   (or "xml_base64")
+    one response per line, in completion order,
+        {"id": 1, "ok": true, "format": "md", "data_base64": "..."}
+        {"id": 1, "ok": false, "errors": {"read": "..."}}
+    Requests run concurrently on the worker pool; once workers + backlog requests are in
+    flight, the next line isn't read until one of them completes.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    write_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(service.workers + service.backlog)
+    requests = ThreadPoolExecutor(max_workers=service.workers * 2, thread_name_prefix="request")
+
+    def respond(message: dict):
+        with write_lock:
+            stdout.write(json.dumps(message) + "\n")
+            stdout.flush()
+
+    def handle(request_id, xml: bytes, fmt: str):
+        try:
+            data, errors = service.render(xml, fmt, wait=True)
+            if errors:
+                respond({"id": request_id, "ok": False, "errors": errors})
+            else:
+                respond({"id": request_id, "ok": True, "format": fmt,
+                         "data_base64": base64.b64encode(data).decode("ascii")})
+        finally:
+            in_flight.release()
+
+    logger.info(f"Export service reading JSON lines from stdin with {service.workers} worker(s)")
+    try:
+        while True:
+            in_flight.acquire()  # released by handle(), or below when the line isn't submitted
+            line = stdin.readline()
+            if not line:
+                in_flight.release()
+                break
+            line = line.strip()
+            if not line:
+                in_flight.release()
+                continue
+            try:
+                request = json.loads(line)
+                if "xml_base64" in request:
+                    xml = base64.b64decode(request["xml_base64"])
+                else:
+                    xml = request["xml"].encode("utf-8")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                in_flight.release()
+                respond({"id": None, "ok": False, "errors": {"request": f"Bad request line: {e}"}})
+                continue
+            requests.submit(handle, request.get("id"), xml, str(request.get("format", "pdf")))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        requests.shutdown(wait=True)
+        service.shutdown()
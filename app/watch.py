@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.export_cache import file_digest
+from app.pipeline import ExportPipeline
+
+logger = logging.getLogger("Watch")
+
+
+class FolderWatcher:
+    """
+    Polls a folder for new or changed .xml files and re-exports them with a warm pipeline.
+    A file is exported once its size/mtime have been stable for `settle` seconds (FGU writes
+    /exportchar files in several chunks), and only if its content actually changed since the
+    last successful export. Polling keeps this dependency-free and portable.
+    """
+
+    def __init__(self, folder: str, pipeline: ExportPipeline, output_dir: str, fmt: str = "both",
+                 interval: float = 0.1, settle: float = 0.25):
+        self.folder = folder
+        self.pipeline = pipeline
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.interval = interval
+        self.settle = settle
+        # path -> ((size, mtime_ns), time the stamp was first seen)
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+        # path -> digest of the content last exported successfully
+        self._exported: Dict[str, str] = {}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        stamps = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith(".xml"):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue  # Deleted between listing and stat
+                        stamps[entry.path] = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            logger.warning(f"Watch folder disappeared: {self.folder}")
+        return stamps
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """One polling step. Returns the number of files exported."""
+        now = time.monotonic() if now is None else now
+        stamps = self._scan()
+
+        for path in list(self._stamps):
+            if path not in stamps:
+                # Removed: forget it so a re-created file is exported again
+                self._stamps.pop(path, None)
+                self._pending.pop(path, None)
+                self._exported.pop(path, None)
+
+        for path, stamp in stamps.items():
+            if self._stamps.get(path) != stamp:
+                self._stamps[path] = stamp
+                self._pending[path] = (stamp, now)
+
+        exported = 0
+        for path, (stamp, since) in list(self._pending.items()):
+            if now - since < self.settle or stamp[0] == 0:
+                continue  # Still being written (debounce)
+            del self._pending[path]
+            if self._export(path):
+                exported += 1
+        return exported
+
+    def _export(self, path: str) -> bool:
+        try:
+            digest = file_digest(path)
+        except OSError as e:
+            logger.warning(f"Could not read {path}: {e}")
+            return False
+        if self._exported.get(path) == digest:
+            logger.debug(f"{os.path.basename(path)} touched but unchanged; skipping.")
+            return False
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        start = time.perf_counter()
+        result = self.pipeline.export(path, os.path.join(self.output_dir, stem), self.fmt)
+        elapsed = time.perf_counter() - start
+        if result.ok:
+            self._exported[path] = digest
+            logger.info(f"Updated {', '.join(os.path.basename(o) for o in result.outputs)} in {elapsed * 1000:.0f} ms")
+            return True
+
+        # Leave the digest unset so the next change (or a completed write) retries
+        details = "; ".join(f"{stage}: {msg}" for stage, msg in result.errors.items())
+        logger.error(f"Export of {os.path.basename(path)} failed: {details}")
+        return False
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        """Poll until Ctrl+C (or until stop_event is set)."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        logger.info(f"Watching {os.path.abspath(self.folder)} for character exports (Ctrl+C to stop)...")
+        try:
+            while stop_event is None or not stop_event.is_set():
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            logger.info("Watch stopped.")
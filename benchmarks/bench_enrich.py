@@ -0,0 +1,55 @@
+"""
+DnD5eEnricher timing on a spell-heavy character with multi-component weapons.
+
+    python -m benchmarks.bench_enrich [--powers 500] [--weapons 50] [--components 4] [--repeat 20]
+"""
+import argparse
+import logging
+import os
+import time
+
+from adapters.input.xml_reader import XMLReader
+from benchmarks.synthetic import make_character_xml
+from core.logic.dnd5e import DnD5eEnricher, StatContext
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DnD5eEnricher microbenchmark")
+    parser.add_argument("--powers", type=int, default=500)
+    parser.add_argument("--weapons", type=int, default=50)
+    parser.add_argument("--components", type=int, default=4, help="damage components per weapon")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    reader = XMLReader(RULES_PATH)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench_enrich.xml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(make_character_xml(powers=args.powers, weapons=args.weapons, damage_components=args.components))
+
+    enricher = DnD5eEnricher()
+    enrich_best = context_best = float("inf")
+    try:
+        for _ in range(args.repeat):
+            # enrich() mutates the character, so every round starts from a fresh parse
+            character = reader.parse(path)
+            start = time.perf_counter()
+            enricher.enrich(character)
+            enrich_best = min(enrich_best, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            StatContext(character)
+            context_best = min(context_best, time.perf_counter() - start)
+    finally:
+        os.remove(path)
+
+    items = args.powers + args.weapons * args.components
+    print(f"enrich   powers={args.powers} weapons={args.weapons}x{args.components}  "
+          f"total={enrich_best * 1000:.2f} ms  per item={enrich_best * 1e6 / items:.1f} us  "
+          f"stat context={context_best * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares the compiled ExtractionPlan against the previous per-field find() loop.
+
+    python -m benchmarks.bench_extraction_plan [--powers 300] [--repeat 20]
+"""
+import argparse
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+
+from adapters.input.xml_reader import XMLReader
+from benchmarks.synthetic import make_character_xml
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+
+
+def _get_text(node, xpath):
+    try:
+        found = node.find(xpath)
+        if found is not None:
+            text = "".join(found.itertext())
+            return text.strip() if text else None
+    except Exception:
+        pass
+    return None
+
+
+def xml_to_dict(element):
+    if len(element) == 0:
+        return element.text or ""
+    result = {}
+    for child in element:
+        child_val = xml_to_dict(child)
+        if child.tag in result:
+            if isinstance(result[child.tag], list):
+                result[child.tag].append(child_val)
+            else:
+                result[child.tag] = [result[child.tag], child_val]
+        else:
+            result[child.tag] = child_val
+    return result
+
+
+def legacy_extract(root, rule):
+    """The pre-plan loop: substring match per child, one find() per field per item."""
+    container = root.find(rule['container'])
+    if container is None:
+        return []
+    items = []
+    for child in container:
+        if rule['item_pattern'] in child.tag:
+            item_data = {}
+            for field_name, field_config in rule['fields'].items():
+                val = None
+                if isinstance(field_config, str):
+                    val = _get_text(child, field_config)
+                elif field_config.get('type') == 'subtree':
+                    sub_node = child.find(field_config.get('path'))
+                    if sub_node is not None:
+                        val = xml_to_dict(sub_node)
+                else:
+                    val = _get_text(child, field_config.get('path'))
+                if val is not None and (isinstance(val, dict) or val.strip() != ""):
+                    item_data[field_name] = val
+            required_field = rule.get('required_field')
+            if required_field and not item_data.get(required_field):
+                continue
+            if item_data:
+                items.append(item_data)
+    return items
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ExtractionPlan vs legacy list extraction")
+    parser.add_argument("--powers", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    reader = XMLReader(RULES_PATH)
+    root = ET.fromstring(make_character_xml(powers=args.powers, inventory=args.powers // 2))
+    rules = reader.rules.get('lists', [])
+
+    def run_legacy():
+        return [legacy_extract(root, rule) for rule in rules]
+
+    def run_plan():
+        return [reader._extract_list_items(root, list_plan) for list_plan in reader.plan.lists]
+
+    def run_legacy_singles():
+        return [_get_text(root, xpath) for xpath in reader.rules.get('single', {}).values()]
+
+    def run_plan_singles():
+        return [selector.text(root) for _, selector in reader.plan.singles]
+
+    assert run_legacy() == run_plan(), "plan output differs from legacy loop"
+    assert run_legacy_singles() == run_plan_singles(), "plan singles differ from legacy find()"
+
+    for label, legacy_fn, plan_fn in (("lists", run_legacy, run_plan), ("singles", run_legacy_singles, run_plan_singles)):
+        legacy = _best(legacy_fn, args.repeat)
+        plan = _best(plan_fn, args.repeat)
+        print(f"{label:8} powers={args.powers}  legacy={legacy * 1000:.2f} ms  plan={plan * 1000:.2f} ms  speedup={legacy / plan:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
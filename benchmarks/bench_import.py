@@ -0,0 +1,62 @@
+"""
+Cold-start import time: imports a module in a fresh interpreter under -X importtime and
+reports the slowest imports. The budget itself is enforced by tests/test_import_time.py.
+
+    python -m benchmarks.bench_import [--module gui] [--repeat 5] [--top 15] [--output imports.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """One fresh interpreter: {module name: (self us, cumulative us)}."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def best_import_times(module, repeat):
+    """The run (see import_times) with the lowest cumulative time for module itself."""
+    runs = [import_times(module) for _ in range(repeat)]
+    return min(runs, key=lambda times: times[module][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time report")
+    parser.add_argument("--module", default="gui", help="module to import (default: gui)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters; the best run counts")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--output", help="also write the best run as JSON")
+    args = parser.parse_args()
+
+    best = best_import_times(args.module, args.repeat)
+    total_ms = best[args.module][1] / 1000
+
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.2f} {cumulative_us / 1000:9.2f}  {name}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "total_ms": round(total_ms, 3),
+                       "modules": {name: {"self_ms": s / 1000, "cumulative_ms": c / 1000} for name, (s, c) in best.items()}},
+                      f, indent=2)
+
+    print(f"import {args.module}: {total_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
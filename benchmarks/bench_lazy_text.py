@@ -0,0 +1,66 @@
+"""
+Eager vs. lazy description text and subtrees: parse time, the memory the parsed
+Character keeps (tracemalloc), the parse peak, and the time to decode every deferred
+field once.
+
+    python -m benchmarks.bench_lazy_text [--tiers large huge] [--repeat 3]
+"""
+import argparse
+import gc
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from adapters.input.xml_reader import XMLReader
+from benchmarks.synthetic import TIERS, make_character_xml
+from core.records import Deferred, Record
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+
+
+def measure(reader, xml_path, lazy, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reader.parse(xml_path, lazy_text=lazy)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    character = reader.parse(xml_path, lazy_text=lazy)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    deferred = [(item, key) for items in character.lists.values() for item in items if isinstance(item, Record)
+                for key in item if isinstance(item._raw(key), Deferred)]
+    start = time.perf_counter()
+    for item, key in deferred:
+        item[key]
+    return best, retained, peak, len(deferred), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eager vs. lazy (mmap-backed) description text")
+    parser.add_argument("--tiers", nargs="+", default=["large", "huge"], choices=sorted(TIERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    reader = XMLReader(RULES_PATH)
+    mib = 1024 * 1024
+    with tempfile.TemporaryDirectory() as workdir:
+        for tier in args.tiers:
+            xml_path = os.path.join(workdir, f"{tier}.xml")
+            with open(xml_path, "w", encoding="utf-8") as f:
+                f.write(make_character_xml(**TIERS[tier]))
+            for label, lazy in (("eager", False), ("lazy", True)):
+                seconds, retained, peak, deferred, decode = measure(reader, xml_path, lazy, args.repeat)
+                print(f"{tier:6} {label:5} parse {seconds * 1000:8.2f} ms  retained {retained / mib:7.2f} MiB"
+                      f"  peak {peak / mib:7.2f} MiB  deferred {deferred:5} (decoded in {decode * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Static sheet chrome drawn on every page vs. once as a form XObject: time and file size of
+a 20-page spellbook-like document, plus the cost of building the paragraph styles.
+
+    python -m benchmarks.bench_pdf_chrome [--pages 20] [--boxes 24] [--repeat 5]
+
+Needs ReportLab.
+"""
+import argparse
+import io
+import time
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+except ImportError as e:
+    A4 = None
+    MISSING = e
+
+from benchmarks.synthetic import WORDS
+
+
+def build(pages, chrome, use_forms):
+    from adapters.output.pdf_resources import sheet_styles
+    styles = sheet_styles()
+    story = []
+    for page in range(pages):
+        story.append(Paragraph(f"Spells, page {page + 1}", styles["section"]))
+        for i in range(12):
+            story.append(Paragraph(f"Spell {page * 12 + i}", styles["item"]))
+            story.append(Paragraph(" ".join(WORDS), styles["body"]))
+        story.append(PageBreak())
+
+    callback = chrome.on_page if use_forms else (lambda canvas, doc: chrome.draw(canvas))
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=60, bottomMargin=50)
+    doc.build(story, onFirstPage=callback, onLaterPages=callback)
+    return buffer.getbuffer().nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF chrome: per-page redraw vs form XObject")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--boxes", type=int, default=24, help="labelled boxes in the static chrome")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if A4 is None:
+        print(f"skipped: ReportLab not installed ({MISSING})")
+        return
+
+    from adapters.output.pdf_resources import ChromeBox, SheetChrome, sheet_styles
+    width, height = A4
+    columns = 4
+    box_w = (width - 56) / columns
+    chrome = SheetChrome(A4, boxes=[ChromeBox(28 + (i % columns) * box_w, 40 + (i // columns) * 20, box_w - 4, 16, f"field {i}")
+                                    for i in range(args.boxes)])
+
+    start = time.perf_counter()
+    sheet_styles.cache_clear()
+    sheet_styles()
+    styles_cold = time.perf_counter() - start
+    start = time.perf_counter()
+    sheet_styles()
+    styles_warm = time.perf_counter() - start
+    print(f"styles   cold={styles_cold * 1000:.2f} ms  cached={styles_warm * 1e6:.1f} us")
+
+    for label, use_forms in (("redraw", False), ("xobject", True)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = build(args.pages, chrome, use_forms)
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:8} pages={args.pages}  {best * 1000:8.2f} ms  ({best * 1000 / args.pages:.2f} ms/page)  {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
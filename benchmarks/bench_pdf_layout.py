@@ -0,0 +1,58 @@
+"""
+Spellbook layout pass: wraps and page breaks for every spell of a synthetic character,
+with memoized text measurement. Prints how many widths actually had to be measured.
+
+    python -m benchmarks.bench_pdf_layout [--tier huge] [--repeat 5]
+
+Uses ReportLab's stringWidth when installed, a fixed-advance estimate otherwise.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from adapters.input.xml_reader import XMLReader
+from adapters.output.pdf_layout import SpellbookLayout, TextMeasurer
+from benchmarks.synthetic import TIERS, make_character_xml
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+A4_FRAME = (539.0, 740.0)
+
+
+def _estimate(text, font, size):
+    return len(text) * size * 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF spellbook layout benchmark")
+    parser.add_argument("--tier", choices=list(TIERS), default="huge")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    try:
+        from reportlab.pdfbase.pdfmetrics import stringWidth as measure
+        backend = "reportlab"
+    except ImportError:
+        measure, backend = _estimate, "estimate"
+
+    with tempfile.TemporaryDirectory(prefix="fg_bench_") as workdir:
+        path = os.path.join(workdir, f"{args.tier}.xml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(make_character_xml(**TIERS[args.tier]))
+        spells = XMLReader(RULES_PATH).parse(path).lists.get("Spells & Powers", [])
+
+    words = sum(len(str(spell.get("Description") or "").split()) for spell in spells)
+    best = float("inf")
+    for _ in range(args.repeat):
+        measurer = TextMeasurer(measure)
+        start = time.perf_counter()
+        pages = SpellbookLayout(*A4_FRAME, measurer=measurer).layout(spells)
+        best = min(best, time.perf_counter() - start)
+    print(f"layout  {args.tier}: {len(spells)} spells, {words} description words -> {len(pages)} pages "
+          f"in {best * 1000:.2f} ms ({backend}); {measurer.measured} widths measured")
+
+
+if __name__ == "__main__":
+    main()
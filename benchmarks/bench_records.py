@@ -0,0 +1,54 @@
+"""
+Memory held by extracted list items: typed __slots__ Records vs plain dicts.
+
+    python -m benchmarks.bench_records [--powers 5000] [--inventory 5000]
+"""
+import argparse
+import gc
+import logging
+import os
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from adapters.input.xml_reader import XMLReader
+from benchmarks.synthetic import make_character_xml
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+LISTS = ("Spells & Powers", "Inventory", "Weapons")
+
+
+def _current() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record vs dict memory for list items")
+    parser.add_argument("--powers", type=int, default=5000)
+    parser.add_argument("--inventory", type=int, default=5000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    reader = XMLReader(RULES_PATH)
+    root = ET.fromstring(make_character_xml(powers=args.powers, weapons=200, inventory=args.inventory))
+    plans = [list_plan for list_plan in reader.plan.lists if list_plan.name in LISTS]
+
+    tracemalloc.start()
+    for list_plan in plans:
+        base = _current()
+        records = reader._extract_list_items(root, list_plan)
+        record_bytes = _current() - base
+
+        # Same values, held the way items were stored before (one dict per item)
+        dicts = [dict(record) for record in records]
+        del records
+        dict_bytes = _current() - base
+
+        print(f"{list_plan.name:16} items={len(dicts):6}  dicts={dict_bytes / 1024:9.1f} KiB  "
+              f"records={record_bytes / 1024:9.1f} KiB  saved={1 - record_bytes / dict_bytes:.0%}")
+        del dicts
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Parse + enrich from XML vs. loading the enriched character from a snapshot, per synthetic
+size tier and codec, with the snapshot sizes.
+
+    python -m benchmarks.bench_snapshot [--tiers small large huge] [--repeat 5]
+
+The msgpack rows are skipped when msgpack isn't installed.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from adapters.input import snapshot
+from adapters.input.xml_reader import XMLReader
+from benchmarks.synthetic import TIERS, make_character_xml
+from core.logic.factory import EnricherFactory
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XML parse + enrich vs. snapshot load")
+    parser.add_argument("--tiers", nargs="+", default=["small", "large", "huge"], choices=sorted(TIERS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    reader = XMLReader(RULES_PATH)
+    enricher = EnricherFactory.get("dnd5e")
+    codecs = ["json"] + (["msgpack"] if snapshot.msgpack is not None else [])
+    with tempfile.TemporaryDirectory() as workdir:
+        for tier in args.tiers:
+            xml_path = os.path.join(workdir, f"{tier}.xml")
+            with open(xml_path, "w", encoding="utf-8") as f:
+                f.write(make_character_xml(**TIERS[tier]))
+            xml_time, character = best_of(args.repeat, lambda: enricher.enrich(reader.parse(xml_path)))
+            print(f"{tier:6} xml      {xml_time * 1000:9.2f} ms  {os.path.getsize(xml_path) / 1024:9.1f} KiB")
+            for codec in codecs:
+                path = os.path.join(workdir, f"{tier}-{codec}.fgsnap")
+                snapshot.save_snapshot(character, path, codec)
+                load_time, _ = best_of(args.repeat, lambda: snapshot.load_snapshot(path))
+                print(f"{tier:6} {codec:8} {load_time * 1000:9.2f} ms  {os.path.getsize(path) / 1024:9.1f} KiB"
+                      f"  ({xml_time / load_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
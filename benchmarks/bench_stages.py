@@ -0,0 +1,146 @@
+"""
+Times each export stage (parse, enrich, Markdown, PDF) across synthetic size tiers and
+writes the numbers as JSON, so runs can be compared and regressions caught.
+
+    python -m benchmarks.bench_stages [--tiers small medium large] [--repeat 5]
+                                      [--output stages.json] [--baseline old.json --threshold 0.15]
+
+Exits with 1 when --baseline is given and any stage got slower than the threshold allows.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from adapters.input.xml_reader import XMLReader
+from app.export_cache import WRITER_MODULES
+from benchmarks.synthetic import TIERS, make_character_xml
+from core.domain import freeze
+from core.logic.factory import EnricherFactory
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+STAGES = ("parse", "enrich", "md", "pdf")
+RESULTS_FORMAT = 1
+WRITER_CLASSES = {"md": "MarkdownWriter", "pdf": "PDFWriter"}
+
+
+def _summary(samples):
+    return {"best_ms": round(min(samples) * 1000, 3), "median_ms": round(statistics.median(samples) * 1000, 3),
+            "runs": len(samples)}
+
+
+def bench_tier(name, params, repeat, workdir, writers):
+    xml_path = os.path.join(workdir, f"{name}.xml")
+    with open(xml_path, "w", encoding="utf-8") as f:
+        f.write(make_character_xml(**params))
+
+    reader = XMLReader(RULES_PATH)
+    enricher = EnricherFactory.get("dnd5e")
+    samples = {stage: [] for stage in STAGES}
+    skipped = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        character = reader.parse(xml_path)
+        samples["parse"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        enricher.enrich(character)
+        samples["enrich"].append(time.perf_counter() - start)
+
+        for fmt in ("md", "pdf"):
+            writer = writers.get(fmt)
+            if isinstance(writer, str):
+                skipped[fmt] = writer
+                continue
+            # Writers get the same read-only snapshot the pipeline hands them
+            snapshot = freeze(character)
+            start = time.perf_counter()
+            writer.write(snapshot, os.path.join(workdir, f"{name}.{fmt}"))
+            samples[fmt].append(time.perf_counter() - start)
+
+    stages = {stage: _summary(values) for stage, values in samples.items() if values}
+    for fmt, reason in skipped.items():
+        stages[fmt] = {"skipped": reason}
+    return {"params": params, "xml_bytes": os.path.getsize(xml_path), "stages": stages}
+
+
+def load_writers():
+    """'md'/'pdf' -> writer instance, or the reason it can't be loaded."""
+    writers = {}
+    for fmt, class_name in WRITER_CLASSES.items():
+        try:
+            writers[fmt] = getattr(importlib.import_module(WRITER_MODULES[fmt]), class_name)()
+        except ImportError as e:
+            writers[fmt] = f"missing dependency ({e})"
+    return writers
+
+
+def compare(results, baseline, threshold):
+    """Stages whose best time grew by more than threshold (fraction) vs the baseline run."""
+    regressions = []
+    for tier, data in results["tiers"].items():
+        old_tier = baseline.get("tiers", {}).get(tier)
+        if not old_tier or old_tier.get("params") != data["params"]:
+            continue
+        for stage, numbers in data["stages"].items():
+            old = old_tier["stages"].get(stage, {})
+            if "best_ms" not in numbers or not old.get("best_ms"):
+                continue
+            change = numbers["best_ms"] / old["best_ms"] - 1
+            if change > threshold:
+                regressions.append(f"{tier}/{stage}: {old['best_ms']:.2f} ms -> {numbers['best_ms']:.2f} ms (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage export benchmarks across size tiers")
+    parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=["small", "medium", "large"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_stages.json", help="JSON results file")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown vs baseline (0.15 = 15%%)")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    writers = load_writers()
+    results = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "tiers": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="fg_bench_") as workdir:
+        for tier in args.tiers:
+            data = bench_tier(tier, TIERS[tier], args.repeat, workdir, writers)
+            results["tiers"][tier] = data
+            cells = []
+            for stage in STAGES:
+                numbers = data["stages"].get(stage, {})
+                cells.append(f"{stage}={numbers['best_ms']:.2f} ms" if "best_ms" in numbers else f"{stage}=skipped")
+            print(f"{tier:7} {data['xml_bytes'] / 1024:8.0f} KiB  " + "  ".join(cells))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than {args.threshold:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Synthetic FGU character XML for benchmarks.
+Produces the same structure as an FGU /exportchar file (root/character/...).
+
+    python -m benchmarks.synthetic out.xml [--tier large] [--powers 2000 --actions 3 ...]
+"""
+import argparse
+import random
+
+ABILITIES = ["strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma"]
+
+
+DAMAGE_TYPES = ["slashing", "fire", "cold", "radiant"]
+CASTER_CLASSES = [("Wizard", "intelligence"), ("Cleric", "wisdom"), ("Sorcerer", "charisma"),
+                  ("Druid", "wisdom"), ("Warlock", "charisma"), ("Bard", "charisma")]
+WORDS = ("the", "arcane", "target", "must", "succeed", "on", "a", "saving", "throw", "or", "take", "damage",
+         "creature", "within", "range", "of", "radiant", "light", "until", "end", "its", "next", "turn")
+
+# Size tiers shared by the stage benchmarks (keyword arguments for make_character_xml)
+TIERS = {
+    "small": dict(powers=20, weapons=3, damage_components=1, actions=1, inventory=20, text_paragraphs=1),
+    "medium": dict(powers=150, weapons=10, damage_components=2, actions=2, inventory=80, text_paragraphs=2),
+    "large": dict(powers=600, weapons=30, damage_components=3, actions=3, inventory=300, text_paragraphs=4, groups=3),
+    "huge": dict(powers=3000, weapons=60, damage_components=4, actions=4, inventory=1500, text_paragraphs=8, groups=6),
+}
+
+
+def make_character_xml(powers: int = 300, weapons: int = 20, inventory: int = 100, seed: int = 1,
+                       damage_components: int = 1, actions: int = 1, text_paragraphs: int = 1, groups: int = 1) -> str:
+    rng = random.Random(seed)
+    groups = max(1, min(groups, len(CASTER_CLASSES)))
+    out = ['<?xml version="1.0" encoding="utf-8"?>\n<root version="4.4">\n<character>']
+    out.append('<name type="string">Synthetic Hero</name><race type="string">Elf</race>')
+    out.append('<hp><total type="number">58</total><current type="number">58</current></hp>')
+
+    out.append('<abilities>')
+    for ability in ABILITIES:
+        score = rng.randint(8, 18)
+        out.append(f'<{ability}><score type="number">{score}</score><bonus type="number">{(score - 10) // 2}</bonus>'
+                   f'<save type="number">{(score - 10) // 2}</save><saveprof type="number">0</saveprof></{ability}>')
+    out.append('</abilities>')
+
+    out.append('<classes><id-00001><name type="string">Wizard</name><level type="number">9</level>'
+               '<hddie type="dice">d6</hddie><spellability type="string">intelligence</spellability></id-00001>')
+    for g in range(1, groups):
+        class_name, ability = CASTER_CLASSES[g]
+        out.append(f'<id-{g + 1:05d}><name type="string">{class_name}</name><level type="number">1</level>'
+                   f'<hddie type="dice">d8</hddie><spellability type="string">{ability}</spellability></id-{g + 1:05d}>')
+    out.append('</classes>')
+    out.append('<skilllist><id-00001><name type="string">Perception</name><total type="number">4</total>'
+               '<prof type="number">1</prof><stat type="string">wisdom</stat></id-00001></skilllist>')
+
+    out.append('<weaponlist>')
+    for i in range(weapons):
+        out.append(f'<id-{i + 1:05d}><name type="string">Weapon {i}</name><bonus type="number">{i % 3}</bonus>'
+                   f'<prof type="number">1</prof><properties type="string">Finesse, Light</properties>'
+                   f'<type type="number">{i % 2}</type><damagelist>')
+        out.append('<id-00001><dice type="dice">d8</dice><stat type="string">base</stat><type type="string">slashing</type></id-00001>')
+        for j in range(1, damage_components):
+            out.append(f'<id-{j + 1:05d}><dice type="dice">{j}d6</dice><bonus type="number">{j % 3}</bonus>'
+                       f'<stat type="string">{ABILITIES[j % len(ABILITIES)]}</stat><statmult type="number">0.5</statmult>'
+                       f'<type type="string">{DAMAGE_TYPES[j % len(DAMAGE_TYPES)]}</type></id-{j + 1:05d}>')
+        out.append(f'</damagelist></id-{i + 1:05d}>')
+    out.append('</weaponlist>')
+
+    out.append('<inventorylist>')
+    for i in range(inventory):
+        out.append(f'<id-{i + 1:05d}><name type="string">Item {i}</name><count type="number">{rng.randint(1, 5)}</count>'
+                   f'<weight type="number">{rng.randint(0, 10)}</weight><location type="string"></location></id-{i + 1:05d}>')
+    out.append('</inventorylist>')
+
+    out.append('<powergroup>')
+    for g in range(groups):
+        class_name, ability = CASTER_CLASSES[g]
+        out.append(f'<id-{g + 1:05d}><name type="string">Spells ({class_name})</name><stat type="string">{ability}</stat></id-{g + 1:05d}>')
+    out.append('</powergroup>')
+    out.append('<powers>')
+    for i in range(powers):
+        group = f"Spells ({CASTER_CLASSES[i % groups][0]})"
+        out.append(f'<id-{i + 1:05d}><name type="string">Spell {i}</name><level type="number">{i % 10}</level>'
+                   f'<group type="string">{group}</group><school type="string">Evocation</school>'
+                   f'<castingtime type="string">1 action</castingtime><range type="string">60 feet</range>'
+                   f'<duration type="string">Instantaneous</duration><save type="string">Dexterity</save>'
+                   f'<description type="formattedtext"><p>Spell {i} deals damage in a <b>wide</b> area.</p>')
+        for _ in range(1, text_paragraphs):
+            out.append(f'<p>{" ".join(rng.choice(WORDS) for _ in range(40)).capitalize()}.</p>')
+        out.append('</description><actions><id-00001><type type="string">cast</type><savetype type="string">dexterity</savetype></id-00001>')
+        for j in range(1, actions):
+            out.append(_action_xml(j, i))
+        out.append(f'</actions></id-{i + 1:05d}>')
+    out.append('</powers>')
+
+    out.append('</character>\n</root>\n')
+    return "".join(out)
+
+
+def _action_xml(j: int, power: int) -> str:
+    """Extra power actions: ability- and fixed-DC casts alternating with damage rolls."""
+    tag = f"id-{j + 1:05d}"
+    kind = j % 3
+    if kind == 1:
+        return (f'<{tag}><type type="string">cast</type><savetype type="string">{ABILITIES[power % 6]}</savetype>'
+                f'<savedcbase type="string">ability</savedcbase><savedcstat type="string">wisdom</savedcstat></{tag}>')
+    if kind == 2:
+        return (f'<{tag}><type type="string">cast</type><savetype type="string">constitution</savetype>'
+                f'<savedcbase type="string">fixed</savedcbase><savedcmod type="number">{12 + power % 5}</savedcmod></{tag}>')
+    return (f'<{tag}><type type="string">damage</type><damagelist><id-00001><dice type="dice">{1 + power % 4}d8</dice>'
+            f'<type type="string">{DAMAGE_TYPES[power % len(DAMAGE_TYPES)]}</type></id-00001></damagelist></{tag}>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic FGU character export")
+    parser.add_argument("output", help="XML file to write")
+    parser.add_argument("--tier", choices=sorted(TIERS), help="start from a size tier")
+    for option in ("powers", "weapons", "damage-components", "actions", "inventory", "text-paragraphs", "groups", "seed"):
+        parser.add_argument(f"--{option}", type=int)
+    args = parser.parse_args()
+
+    params = dict(TIERS[args.tier]) if args.tier else {}
+    for key in ("powers", "weapons", "damage_components", "actions", "inventory", "text_paragraphs", "groups", "seed"):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(make_character_xml(**params))
+
+
+if __name__ == "__main__":
+    main()
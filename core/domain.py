@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Any, MutableMapping, Optional
 
 @dataclass
 class Character:
@@ -13,15 +14,35 @@ class Character:
     data_points: Dict[str, Any] = field(default_factory=dict)
     
     # List values (Classes, Skills, Inventory, Spells)
-    # Key = List Name (from config), Value = List of dictionaries representing items
+    # Key = List Name (from config), Value = List of mappings representing items
+    # (core.records.Record when extracted from XML, plain dicts work too)
     # e.g., "Inventory": [
     #   {"Item": "Backpack", "Count": 1, "Weight": 5, ...},
     #   ...
     # ]
-    lists: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    lists: Dict[str, List[MutableMapping[str, Any]]] = field(default_factory=dict)
+
+    # Open resources behind deferred values (e.g. the mapped input of lazy text): anything
+    # with close(). They reopen on demand, so closing never invalidates the character
+    sources: List[Any] = field(default_factory=list, repr=False, compare=False)
+
+    def close(self):
+        """Release the sources (e.g. once an export is written, so the input isn't held open)."""
+        for source in self.sources:
+            source.close()
     
     def add_data_point(self, key: str, value: Any):
         self.data_points[key] = value
         
-    def add_list(self, key: str, items: List[Dict[str, Any]]):
+    def add_list(self, key: str, items: List[MutableMapping[str, Any]]):
         self.lists[key] = items
+
+
+def freeze(character: Character) -> Character:
+    """
+    Read-only snapshot for writers: data_points and lists become mapping proxies, each list
+    a tuple of read-only item views. Only the views are new; no value or item is copied,
+    so it's cheap even for huge spellbooks, and any number of writers can share it.
+    """
+    lists = {name: tuple(MappingProxyType(item) for item in items) for name, items in character.lists.items()}
+    return Character(data_points=MappingProxyType(character.data_points), lists=MappingProxyType(lists))
@@ -6,6 +6,9 @@ class EnricherStrategy(ABC):
     Interface/Protocol for all Logic Enrichers.
     Ensures that main.py can treat any system (D&D, Pathfinder, etc.) identically.
     """
+
+    # Part of the export cache key: bump whenever the derived output changes
+    version = "1"
     
     @abstractmethod
     def enrich(self, character: Character) -> Character:
@@ -1,87 +1,128 @@
 import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
 from core.domain import Character
-from core.logic.base import EnricherStrategy
+from core.logic.graph import EnrichmentGraph, GraphEnricher
+from core.records import field_value
 
 logger = logging.getLogger("DnD5eLogic")
 
-class DnD5eEnricher(EnricherStrategy):
+MODIFIER_SUFFIX = " Modifier"
+ABILITIES = ["Strength", "Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma"]
+MODIFIER_KEYS = [f"{att}{MODIFIER_SUFFIX}" for att in ABILITIES]
+SPELL_STATS = frozenset(att.lower() for att in ABILITIES)
+# Derived value shared by the steps of one enrichment run (never exported)
+STATS = "stat context"
+
+
+def _parse_bonus(text) -> Optional[int]:
+    """'+3' / '-1' / '2' -> int, None when it isn't a number."""
+    try:
+        return int(text.replace("+", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+class StatContext:
+    """
+    Typed view of the character-wide numbers the enrichment steps keep reusing:
+    ability modifiers, proficiency bonus, total level and class -> spell ability.
+    Built once per enrich() (after modifiers are normalized) so the per-weapon,
+    per-damage-component and per-spell loops never reparse data_points strings.
+    A stat that is present but not a number is kept as None, a missing one reads as 0,
+    which is how the string lookups behaved.
+    """
+    __slots__ = ("modifiers", "proficiency_bonus", "total_level", "spell_abilities", "default_spell_ability")
+
+    def __init__(self, character: Character):
+        points = character.data_points
+        self.modifiers: Dict[str, Optional[int]] = {
+            key[:-len(MODIFIER_SUFFIX)]: _parse_bonus(value)
+            for key, value in points.items() if key.endswith(MODIFIER_SUFFIX)
+        }
+        self.proficiency_bonus: Optional[int] = _parse_bonus(points.get("Proficiency Bonus", "0"))
+
+        classes = character.lists.get("Classes", [])
+        self.total_level = total_class_level(classes)
+        self.spell_abilities: Dict[str, Optional[str]] = {}
+        self.default_spell_ability: Optional[str] = None
+        for c in classes:
+            ability = c.get("SpellAbility")
+            self.spell_abilities.setdefault(c.get("Class"), ability)
+            if ability and not self.default_spell_ability:
+                self.default_spell_ability = ability
+
+    def modifier(self, stat: str) -> Optional[int]:
+        """Modifier for an ability name in any case ('dexterity', 'Dexterity'); 0 if unknown."""
+        return self.modifiers.get(stat.capitalize(), 0)
+
+
+def total_class_level(classes) -> int:
+    return sum(field_value(c, "Level", "int", 0) for c in classes)
+
+
+class DnD5eEnricher(GraphEnricher):
     """
     Domain Service for enriching a generic Character object with D&D 5e specific derived statistics.
     Strictly follows the rule: Input -> Enricher -> Output.
     """
+
+    version = "0.9"
     
+    def build_graph(self) -> EnrichmentGraph:
+        graph = EnrichmentGraph()
+        graph.add("modifiers", self._enrich_modifiers, reads=ABILITIES + MODIFIER_KEYS, writes=MODIFIER_KEYS)
+        graph.add("proficiency bonus", self._enrich_proficiency_bonus, requires=["Classes"], writes=["Proficiency Bonus"])
+        # Everything below reads numbers from the context instead of data_points strings
+        graph.add("stat context", self._build_stat_context, reads=MODIFIER_KEYS + ["Proficiency Bonus", "Classes"], writes=[STATS])
+        graph.add("hit dice", self._enrich_hit_dice, requires=["Classes"], writes=["Hit Dice"])
+        graph.add("spell dc", self._enrich_spell_dc, requires=[STATS], reads=["Power Groups"], writes=["Spell Save DC"])
+        graph.add("passive perception", self._enrich_passive_perception, requires=["Skills"], writes=["Passive Perception"])
+        graph.add("weapons", self._enrich_weapons, requires=["Weapons", STATS], writes=["Weapons"],
+                  edits={"Weapons": ["Total Attack", "Damage"]})
+        graph.add("spells", self._enrich_spells, requires=["Spells & Powers", STATS], reads=["Power Groups"],
+                  writes=["Spells & Powers"], edits={"Spells & Powers": ["Save"]})
+        graph.add("clean up", self._clean_data, reads=["Passive Perception"], writes=["Current HP", "Notes"])
+        return graph
+
     def enrich(self, character: Character) -> Character:
         """
         Main entry point. Modifies the character in place (or returns it) with calculated fields.
         """
         logger.info("Enriching character data with D&D 5e logic...")
-        
-        self._enrich_modifiers(character)
-        self._enrich_proficiency_bonus(character)
-        self._enrich_hit_dice(character)
-        self._enrich_spell_dc(character)
-        self._enrich_passive_perception(character)
-        self._enrich_passive_perception(character)
-        self._enrich_weapons(character)
-        self._enrich_spells(character)
-        self._clean_data(character)
-
-        return character
-
-    def _enrich_spells(self, character: Character):
+        return super().enrich(character)
+
+    def _build_stat_context(self, character: Character, derived: Dict[str, Any]):
+        return {STATS: StatContext(character)}
+
+    def _enrich_spells(self, character: Character, derived: Dict[str, Any]):
         """Calculate Spell Save DC strings for spells."""
         spells = character.lists.get("Spells & Powers", [])
         if not spells: return
         
-        prof_val = 0
-        try:
-             prof_val = int(character.data_points.get("Proficiency Bonus", "+0").replace("+", ""))
-        except:
-             pass
+        ctx = derived[STATS]
+        prof_val = ctx.proficiency_bonus or 0
              
         # Map Group Name -> Data (Stat, DC base?)
         # We need to find the definition of the group in "Power Groups" list
         pg_list = character.lists.get("Power Groups", [])
         pg_map = {pg.get("Name", ""): pg for pg in pg_list}
         
-        # Also map Classes -> SpellAbility
-        classes = character.lists.get("Classes", [])
-        # Simple map: "Spells (Wizard)" -> "Wizard" -> "intelligence"
-        
-        stats = ["strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma"]
+        # Spell lists run into the thousands across a handful of groups: resolve each
+        # group once, and each distinct cast-action shape once
+        group_dcs: Dict[str, Optional[int]] = {}
+        action_saves: Dict[tuple, Optional[str]] = {}
         
         for s in spells:
             # 1. Attempt to extract Save info from 'actions' (Nested XML)
-            action_save_data = self._extract_save_from_actions(s, character, prof_val)
+            action_save_data = self._extract_save_from_actions(s, ctx, prof_val, action_saves)
             
-            # 2. Try to calculate Generic/Group DC (needed for fallback or resolving action data)
+            # 2. Generic/Group DC (needed for fallback or resolving action data)
             group_name = s.get("Group", "")
-            stat_name = None
-            dc = None
-            
-            # Strategy A: Check Power Groups list
-            if group_name in pg_map:
-                pg = pg_map[group_name]
-                raw_stat = pg.get("SaveStat", "") or pg.get("Stat", "")
-                if raw_stat: stat_name = raw_stat
-            
-            # Strategy B: Infer from Group Name
-            if not stat_name and "(" in group_name:
-                 possible_class = group_name.split("(")[1].replace(")", "").strip()
-                 for c in classes:
-                     if c.get("Class") == possible_class:
-                         stat_name = c.get("SpellAbility")
-                         break
-            
-            # Calc DC if stat found
-            if stat_name:
-                 stat_name = stat_name.lower()
-                 if stat_name in stats:
-                     mod_str = character.data_points.get(f"{stat_name.capitalize()} Modifier", "+0")
-                     try:
-                         mod_val = int(mod_str.replace("+", ""))
-                         dc = 8 + prof_val + mod_val
-                     except: pass
+            if group_name in group_dcs:
+                dc = group_dcs[group_name]
+            else:
+                dc = group_dcs[group_name] = self._group_dc(group_name, pg_map, ctx, prof_val)
             
             # 3. Apply Save Logic
             if action_save_data:
@@ -102,11 +143,37 @@ class DnD5eEnricher(EnricherStrategy):
                      short_save = raw_save[:3].upper()
                      s["Save"] = f"DC {dc} {short_save}"
 
+    def _group_dc(self, group_name: str, pg_map: Dict[str, Any], ctx: StatContext, prof_val: int) -> Optional[int]:
+        """Save DC of a power group (8 + prof + stat mod), or None if no stat can be resolved."""
+        stat_name = None
+        
+        # Strategy A: Check Power Groups list
+        if group_name in pg_map:
+            pg = pg_map[group_name]
+            raw_stat = pg.get("SaveStat", "") or pg.get("Stat", "")
+            if raw_stat: stat_name = raw_stat
+        
+        # Strategy B: Infer from Group Name
+        # Simple map: "Spells (Wizard)" -> "Wizard" -> "intelligence"
+        if not stat_name and "(" in group_name:
+             possible_class = group_name.split("(")[1].replace(")", "").strip()
+             stat_name = ctx.spell_abilities.get(possible_class)
+        
+        # Calc DC if stat found
+        if stat_name:
+             stat_name = stat_name.lower()
+             if stat_name in SPELL_STATS:
+                 mod_val = ctx.modifier(stat_name)
+                 if mod_val is not None:
+                     return 8 + prof_val + mod_val
+        return None
 
-    def _extract_save_from_actions(self, spell: dict, character: Character, prof_val: int) -> str:
+    def _extract_save_from_actions(self, spell: dict, ctx: StatContext, prof_val: int,
+                                   memo: Optional[Dict[tuple, Optional[str]]] = None) -> str:
         """
         Inspect 'actions' dict to find cast actions with save info.
         Returns formatted string "DC X STAT" or None.
+        Results are memoized per action shape when a memo dict is passed.
         """
         actions = spell.get("actions", {})
         # XMLReader might return a list of dicts if multiple 'id-00001', or a dict of dicts.
@@ -115,57 +182,62 @@ class DnD5eEnricher(EnricherStrategy):
         # Let's handle both list and dict to be safe.
         
         action_list = []
-        if isinstance(actions, dict):
+        if isinstance(actions, Mapping):
              action_list = actions.values()
         elif isinstance(actions, list):
              action_list = actions
              
         for action in action_list:
-            if not isinstance(action, dict): continue
+            if not isinstance(action, Mapping): continue
             
             # Check type='cast'
-            if action.get("type") == "cast":
-                save_type = action.get("savetype", "")
-                if not save_type: continue
-                
-                short_save = save_type[:3].upper()
-                
-                # Determine DC
-                dc_base = action.get("savedcbase", "group")
-                dc_val = 0
-                
-                if dc_base == "fixed":
-                    try:
-                        dc_val = int(action.get("savedcmod", "0"))
-                    except: pass
-                
-                elif dc_base == "ability":
-                    # savedcstat e.g. "wisdom"
-                    stat = action.get("savedcstat", "")
-                    if stat:
-                        mod_str = character.data_points.get(f"{stat.capitalize()} Modifier", "+0")
-                        try:
-                            mod = int(mod_str.replace("+", ""))
-                            dc_val = 8 + prof_val + mod
-                        except: pass
-                
-                elif dc_base == "group":
-                    # Fallback to group logic (calculated in parent loop as 'dc')
-                    # We need 'dc' passing in? Or re-calc?
-                    # Ideally we use the 'dc' we already calculated in the loop.
-                    # But cleaning up refactoring: return (dc_val, save_type) tuple?
-                    # Or just return None and let parent use 'dc' + 'save_type'.
-                    return f"DC ? {short_save}" # Special marker to fill in DC from parent
-
-                if dc_val > 0:
-                    return f"DC {dc_val} {short_save}"
+            if action.get("type") != "cast": continue
+            shape = (action.get("savetype", ""), action.get("savedcbase", "group"),
+                     action.get("savedcmod", "0"), action.get("savedcstat", ""))
+            if memo is None:
+                save = self._action_save(*shape, ctx, prof_val)
+            elif shape in memo:
+                save = memo[shape]
+            else:
+                save = memo[shape] = self._action_save(*shape, ctx, prof_val)
+            if save:
+                return save
                     
         return None
 
-    def _enrich_modifiers(self, character: Character):
+    def _action_save(self, save_type: str, dc_base: str, dc_mod: str, dc_stat: str,
+                     ctx: StatContext, prof_val: int) -> Optional[str]:
+        """Save string for one cast action, None if it carries no usable save."""
+        if not save_type: return None
+        
+        short_save = save_type[:3].upper()
+        
+        # Determine DC
+        dc_val = 0
+        
+        if dc_base == "fixed":
+            try:
+                dc_val = int(dc_mod)
+            except: pass
+        
+        elif dc_base == "ability":
+            # savedcstat e.g. "wisdom"
+            if dc_stat:
+                mod = ctx.modifier(dc_stat)
+                if mod is not None:
+                    dc_val = 8 + prof_val + mod
+        
+        elif dc_base == "group":
+            # The group DC is resolved by the caller (_enrich_spells)
+            return f"DC ? {short_save}" # Special marker to fill in DC from parent
+
+        if dc_val > 0:
+            return f"DC {dc_val} {short_save}"
+        return None
+
+    def _enrich_modifiers(self, character: Character, derived: Dict[str, Any]):
         """Calculate Ability Modifiers from Scores if missing."""
-        atts = ["Strength", "Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma"]
-        for att in atts:
+        for att in ABILITIES:
             score_str = character.data_points.get(att)
             mod_str = character.data_points.get(f"{att} Modifier")
 
@@ -186,7 +258,7 @@ class DnD5eEnricher(EnricherStrategy):
                 except ValueError:
                     pass
 
-    def _clean_data(self, character: Character):
+    def _clean_data(self, character: Character, derived: Dict[str, Any]):
         """Clean up data based on specific user rules."""
         # Rule: "leave the spot for current hit points blank"
         character.data_points["Current HP"] = ""
@@ -199,28 +271,21 @@ class DnD5eEnricher(EnricherStrategy):
             # pdf_writer currently just draws a rect. I'll need to update it to use _draw_list_box or custom.
             # Let's populate 'Notes' list with a dict.
             notes = character.lists.get("Notes", [])
-            # check if already there to avoid dupes on re-run? internal logic implies single pass.
-            notes.insert(0, {"Name": f"Passive Perception: {pp}"})
-            character.lists["Notes"] = notes
+            # A new list, not an insert: a recompute puts the source list back first
+            character.lists["Notes"] = [{"Name": f"Passive Perception: {pp}"}, *notes]
 
-    def _enrich_proficiency_bonus(self, character: Character):
+    def _enrich_proficiency_bonus(self, character: Character, derived: Dict[str, Any]):
         """Calculate Proficiency Bonus from Total Class Level."""
         if character.data_points.get("Proficiency Bonus"):
             return # Already exists
 
-        classes = character.lists.get("Classes", [])
-        total_level = 0
-        for c in classes:
-            try:
-                total_level += int(c.get("Level", 0))
-            except: pass
-            
+        total_level = total_class_level(character.lists.get("Classes", []))
         if total_level > 0:
             pb = ((total_level - 1) // 4) + 2
             character.data_points["Proficiency Bonus"] = f"+{pb}"
             logger.info(f"Calculated Proficiency Bonus: +{pb} (Level {total_level})")
             
-    def _enrich_hit_dice(self, character: Character):
+    def _enrich_hit_dice(self, character: Character, derived: Dict[str, Any]):
         """Aggregate Hit Dice from classes e.g. '5d10 + 3d8'."""
         classes = character.lists.get("Classes", [])
         hd_list = []
@@ -237,11 +302,13 @@ class DnD5eEnricher(EnricherStrategy):
         if hd_list:
             character.data_points["Hit Dice"] = " + ".join(hd_list)
 
-    def _enrich_spell_dc(self, character: Character):
+    def _enrich_spell_dc(self, character: Character, derived: Dict[str, Any]):
         """Calculate Spell Save DC: 8 + Prof + Ability Mod."""
         if character.data_points.get("Spell Save DC"):
             return
 
+        ctx = derived[STATS]
+
         # Strategy 1: Check Power Groups (Best Source)
         power_groups = character.lists.get("Power Groups", [])
         target_stat = None
@@ -264,70 +331,57 @@ class DnD5eEnricher(EnricherStrategy):
                      
         # Strategy 2: Fallback to Class SpellAbility
         if not target_stat:
-            classes = character.lists.get("Classes", [])
-            for c in classes:
-                s = c.get("SpellAbility")
-                if s: 
-                    target_stat = s
-                    break
+            target_stat = ctx.default_spell_ability
         
         if not target_stat: return # Giving up
         
         target_stat = target_stat.capitalize() # wisdom -> Wisdom
         
-        try:
-            # Need Prof Bonus (Clean string)
-            pb_str = character.data_points.get("Proficiency Bonus", "0").replace("+", "").strip()
-            pb = int(pb_str)
-            
-            # Need Ability Mod
-            mod_str = character.data_points.get(f"{target_stat} Modifier", "0").replace("+", "").strip()
-            mod = int(mod_str)
-            
-            dc = 8 + pb + mod
-            character.data_points["Spell Save DC"] = str(dc)
-            logger.info(f"Calculated Spell DC: {dc} (8 + {pb} + {mod} {target_stat})")
-        except ValueError:
-            pass
+        pb = ctx.proficiency_bonus
+        mod = ctx.modifier(target_stat)
+        if pb is None or mod is None:
+            return
+
+        dc = 8 + pb + mod
+        character.data_points["Spell Save DC"] = str(dc)
+        logger.info(f"Calculated Spell DC: {dc} (8 + {pb} + {mod} {target_stat})")
 
-    def _enrich_passive_perception(self, character: Character):
+    def _enrich_passive_perception(self, character: Character, derived: Dict[str, Any]):
         """Calculate Passive Perception: 10 + Perception Skill Total."""
         skills = character.lists.get("Skills", [])
         for s in skills:
             if s.get("Skill") == "Perception":
-                try:
-                    total = int(s.get("Total", 0))
+                # A missing Total counts as 0; one that isn't a number skips the step
+                total = field_value(s, "Total", "int") if "Total" in s else 0
+                if total is not None:
                     passive = 10 + total
                     character.data_points["Passive Perception"] = str(passive)
                     logger.debug(f"Calculated Passive Perception: {passive}")
-                except: pass
                 break
 
-    def _enrich_weapons(self, character: Character):
+    def _enrich_weapons(self, character: Character, derived: Dict[str, Any]):
         """Calculate Total Attack Bonus and Multi-component Damage for weapons."""
         weapons = character.lists.get("Weapons", [])
         
-        pb_str = character.data_points.get("Proficiency Bonus", "0").replace("+", "").strip()
-        try:
-            prof_bonus = int(pb_str)
-        except: prof_bonus = 0
+        ctx = derived[STATS]
+        prof_bonus = ctx.proficiency_bonus or 0
 
         for w in weapons:
+            w_type = w.get("type", "0") # 0=Melee, 1=Ranged
+
             # --- 1. Attack Calculation ---
             if not w.get("Total Attack"):
                 try:
                     # Determine Stat to use
                     stat_name = w.get("Stat", "").capitalize()
                     properties_str = w.get("Properties", "").lower()
-                    w_type = w.get("type", "0") # 0=Melee, 1=Ranged
                     
                     if "finesse" in properties_str:
-                        try:
-                            str_mod = int(character.data_points.get("Strength Modifier", "0").replace("+", ""))
-                            dex_mod = int(character.data_points.get("Dexterity Modifier", "0").replace("+", ""))
+                        str_mod = ctx.modifier("Strength")
+                        dex_mod = ctx.modifier("Dexterity")
+                        if str_mod is not None and dex_mod is not None:
                             if dex_mod > str_mod: stat_name = "Dexterity"
                             elif not stat_name: stat_name = "Strength"
-                        except: pass
                     
                     if not stat_name:
                         # Baseline fallback: Melee = Strength, Ranged = Dexterity
@@ -335,8 +389,7 @@ class DnD5eEnricher(EnricherStrategy):
                     
                     stat_mod = 0
                     if stat_name:
-                        try: stat_mod = int(character.data_points.get(f"{stat_name} Modifier", "0").replace("+", ""))
-                        except: pass
+                        stat_mod = ctx.modifier(stat_name) or 0
                     
                     usage_prof = prof_bonus if w.get("Proficient") == "1" else 0
                     
@@ -345,18 +398,16 @@ class DnD5eEnricher(EnricherStrategy):
                     try: atk_bonus = int(w.get("Attack Bonus", "0"))
                     except: pass
                     
-                    magic_bonus = 0
-                    try: magic_bonus = int(w.get("Magic Bonus", "0"))
-                    except: pass
+                    magic_bonus = field_value(w, "Magic Bonus", "int", 0)
                     
                     # Heuristic: If weapon-level bonuses are 0, check first damage component's bonus
                     # This helps with inconsistent FGU data where bonus is only in damagelist
                     if atk_bonus == 0 and magic_bonus == 0:
                         damage_data = w.get("DamageData", {})
-                        if isinstance(damage_data, dict) and damage_data:
+                        if isinstance(damage_data, Mapping) and damage_data:
                             first_id = sorted(damage_data.keys())[0]
                             first_comp = damage_data[first_id]
-                            if isinstance(first_comp, dict):
+                            if isinstance(first_comp, Mapping):
                                 try: atk_bonus = int(first_comp.get("bonus", "0"))
                                 except: pass
                     
@@ -373,12 +424,12 @@ class DnD5eEnricher(EnricherStrategy):
             damage_data = w.get("DamageData", {})
             damage_components = []
             
-            # DamageData is a dict of dicts (id-00001: {...}) from subtree extraction
-            if isinstance(damage_data, dict):
+            # DamageData is a (lazy) mapping of mappings (id-00001: {...}) from subtree extraction
+            if isinstance(damage_data, Mapping):
                 # Sort items by key to maintain order
                 items = sorted(damage_data.items())
                 for _, d in items:
-                    if not isinstance(d, dict): continue
+                    if not isinstance(d, Mapping): continue
                     
                     dice = d.get("dice", "")
                     if dice and dice.startswith("d"):
@@ -397,10 +448,7 @@ class DnD5eEnricher(EnricherStrategy):
                     
                     mod_val = 0
                     if stat_key and stat_key.lower() != "na":
-                        # Lookup modifier
-                        mod_str = character.data_points.get(f"{stat_key.capitalize()} Modifier", "0")
-                        try: mod_val = int(mod_str.replace("+", ""))
-                        except: pass
+                        mod_val = ctx.modifier(stat_key) or 0
                     
                     # statmult logic
                     mult = 1.0
@@ -1,6 +1,5 @@
 import logging
 from core.logic.base import EnricherStrategy
-from core.logic.dnd5e import DnD5eEnricher
 
 logger = logging.getLogger("LogicFactory")
 
@@ -13,19 +12,34 @@ class NoOpEnricher(EnricherStrategy):
         logger.debug("NoOp Enricher: Passing data through untouched.")
         return character
 
+def _load_dnd5e():
+    from core.logic.dnd5e import DnD5eEnricher
+    return DnD5eEnricher
+
 class EnricherFactory:
     """
     Factory to instantiate the correct EnricherStrategy based on a string key.
     Future-proofs the app for GUI selection.
+    Entries are classes or loaders returning one; a logic module is only imported the
+    first time it's selected, so importing the factory stays cheap.
     """
     _registry = {
-        "dnd5e": DnD5eEnricher,
+        "dnd5e": _load_dnd5e,
         "none": NoOpEnricher
     }
 
+    @classmethod
+    def resolve(cls, name: str) -> type:
+        key = name.lower() if name else "none"
+        entry = cls._registry.get(key, NoOpEnricher)
+        if not isinstance(entry, type):
+            entry = entry()
+            cls._registry[key] = entry
+        return entry
+
     @classmethod
     def get(cls, name: str) -> EnricherStrategy:
         key = name.lower() if name else "none"
-        enricher_class = cls._registry.get(key, NoOpEnricher)
+        enricher_class = cls.resolve(key)
         logger.info(f"Selected Logic Module: {key} ({enricher_class.__name__})")
         return enricher_class()
@@ -0,0 +1,243 @@
+import heapq
+import logging
+from abc import abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from core import profiling
+from core.domain import Character
+from core.logic.base import EnricherStrategy
+
+logger = logging.getLogger("EnrichmentGraph")
+
+# A step is called as func(character, derived) and may return {derived key: value}
+StepFunc = Callable[[Character, Dict[str, Any]], Optional[Dict[str, Any]]]
+# (mapping, key, value before the step, value the step left) for one value a step replaced
+Edit = Tuple[Any, str, Any, Any]
+
+_ABSENT = object()
+
+
+@dataclass(frozen=True)
+class EnrichmentStep:
+    """
+    One enrichment step and the keys it touches. Keys are data point names, list names,
+    or derived values that only live for one run (e.g. a parsed stat table).
+    - requires: inputs that must be present, otherwise the step is skipped
+    - reads:    optional inputs (ordering and recompute only)
+    - writes:   data points / lists / derived values the step produces or edits
+    - edits:    (list name, item fields) the step sets in place on that list's items
+    """
+    name: str
+    func: StepFunc
+    requires: Tuple[str, ...] = ()
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    edits: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+
+    @property
+    def inputs(self) -> Tuple[str, ...]:
+        return self.requires + self.reads
+
+
+class EnrichmentGraph:
+    """
+    Enrichment steps ordered by their declared inputs/outputs.
+    A step runs after every other step that writes one of its inputs; independent steps
+    keep their registration order, so output stays deterministic.
+    """
+
+    def __init__(self):
+        self.steps: List[EnrichmentStep] = []
+        self._order: Optional[List[EnrichmentStep]] = None
+
+    def add(self, name: str, func: StepFunc, requires: Iterable[str] = (), reads: Iterable[str] = (),
+            writes: Iterable[str] = (), edits: Optional[Mapping[str, Iterable[str]]] = None) -> "EnrichmentGraph":
+        if any(step.name == name for step in self.steps):
+            raise ValueError(f"Enrichment step '{name}' is already registered")
+        edits = tuple((list_name, tuple(fields)) for list_name, fields in (edits or {}).items())
+        self.steps.append(EnrichmentStep(name, func, tuple(requires), tuple(reads), tuple(writes), edits))
+        self._order = None
+        return self
+
+    def order(self) -> List[EnrichmentStep]:
+        """Topological order (Kahn's algorithm, ties broken by registration order)."""
+        if self._order is not None:
+            return self._order
+
+        writers: Dict[str, List[int]] = {}
+        for index, step in enumerate(self.steps):
+            for key in step.writes:
+                writers.setdefault(key, []).append(index)
+
+        successors: List[Set[int]] = [set() for _ in self.steps]
+        indegree = [0] * len(self.steps)
+        for index, step in enumerate(self.steps):
+            for key in step.inputs:
+                for writer in writers.get(key, ()):
+                    # A step editing its own input in place is not a dependency
+                    if writer != index and index not in successors[writer]:
+                        successors[writer].add(index)
+                        indegree[index] += 1
+
+        ready = [index for index, degree in enumerate(indegree) if degree == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            index = heapq.heappop(ready)
+            order.append(self.steps[index])
+            for successor in successors[index]:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    heapq.heappush(ready, successor)
+
+        if len(order) != len(self.steps):
+            cyclic = [step.name for index, step in enumerate(self.steps) if indegree[index] > 0]
+            raise ValueError(f"Enrichment steps form a cycle: {', '.join(cyclic)}")
+        self._order = order
+        return order
+
+    def downstream(self, keys: Iterable[str]) -> List[EnrichmentStep]:
+        """Steps affected (transitively) by a change to any of the given keys, in run order."""
+        dirty = set(keys)
+        affected = []
+        for step in self.order():
+            if dirty.intersection(step.inputs):
+                affected.append(step)
+                dirty.update(step.writes)
+        return affected
+
+    def run(self, character: Character, recompute: bool = False) -> "EnrichmentRun":
+        """Run every step; with recompute=True the run also records what recompute() needs."""
+        run = EnrichmentRun(self, character, tracked=recompute)
+        run.execute(self.order())
+        return run
+
+
+@dataclass
+class EnrichmentRun:
+    """
+    State of one graph run over a character: derived values and which steps ran or were
+    skipped. A tracked run also records the keys each step created and the values it
+    replaced (data points, lists and declared item fields), so recompute() can rebuild
+    them from the source values; untracked runs skip that bookkeeping.
+    """
+    graph: EnrichmentGraph
+    character: Character
+    tracked: bool = False
+    derived: Dict[str, Any] = field(default_factory=dict)
+    executed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    created: Dict[str, Set[str]] = field(default_factory=dict)
+    replaced: Dict[str, List[Edit]] = field(default_factory=dict)
+
+    def has(self, key: str) -> bool:
+        if key in self.derived:
+            return True
+        value = self.character.data_points.get(key)
+        if value is not None and value != "":
+            return True
+        return bool(self.character.lists.get(key))
+
+    def execute(self, steps: Iterable[EnrichmentStep]):
+        profiler = profiling.active()
+        for step in steps:
+            missing = [key for key in step.requires if not self.has(key)]
+            if missing:
+                logger.debug(f"Skipping enrichment step '{step.name}': missing {', '.join(missing)}")
+                self.skipped.append(step.name)
+                continue
+
+            if self.tracked:
+                before = self._keys()
+                sources = self._sources(step)
+            if profiler is None:
+                result = step.func(self.character, self.derived)
+            else:
+                with profiler.measure(profiling.STEP, step.name):
+                    result = step.func(self.character, self.derived)
+            if result:
+                self.derived.update(result)
+            if self.tracked:
+                self.created[step.name] = self._keys() - before
+                replaced = []
+                for container, key, source in sources:
+                    value = container.get(key, _ABSENT)
+                    if value is not source and value != source:
+                        replaced.append((container, key, source, value))
+                if replaced:
+                    self.replaced[step.name] = replaced
+            self.executed.append(step.name)
+
+    def recompute(self, *changed: str) -> List[str]:
+        """
+        Re-run only the steps downstream of the changed keys. Keys those steps created
+        in earlier runs are dropped first and the values they replaced are put back (unless
+        changed since), so every step sees its source values again, as in a fresh run.
+        Returns the names of the steps that ran. Only for tracked runs (enrich_run()).
+        """
+        if not self.tracked:
+            raise ValueError("This run wasn't tracked for recompute(); start it with enrich_run()")
+        steps = self.graph.downstream(changed)
+        for step in reversed(steps):
+            for container, key, source, value in reversed(self.replaced.pop(step.name, ())):
+                if container.get(key, _ABSENT) != value:
+                    continue  # edited after the step: that edit is the new source
+                if source is _ABSENT:
+                    container.pop(key, None)
+                else:
+                    container[key] = source
+        for step in steps:
+            for key in self.created.pop(step.name, ()):
+                self.derived.pop(key, None)
+                self.character.data_points.pop(key, None)
+                self.character.lists.pop(key, None)
+        names = {step.name for step in steps}
+        self.executed = [name for name in self.executed if name not in names]
+        self.skipped = [name for name in self.skipped if name not in names]
+
+        start = len(self.executed)
+        self.execute(steps)
+        return self.executed[start:]
+
+    def _sources(self, step: EnrichmentStep) -> List[Tuple[Any, str, Any]]:
+        """Current values of everything the step may replace: written keys and edited item fields."""
+        sources = []
+        for container in (self.character.data_points, self.character.lists):
+            for key in step.writes:
+                if key in container:
+                    sources.append((container, key, container[key]))
+        for list_name, fields in step.edits:
+            for item in self.character.lists.get(list_name, ()):
+                if isinstance(item, Mapping):
+                    for key in fields:
+                        sources.append((item, key, item.get(key, _ABSENT)))
+        return sources
+
+    def _keys(self) -> Set[str]:
+        return set(self.derived) | set(self.character.data_points) | set(self.character.lists)
+
+
+class GraphEnricher(EnricherStrategy):
+    """
+    EnricherStrategy whose steps live in an EnrichmentGraph.
+    Subclasses implement build_graph(); enrich() runs every step at most once in
+    dependency order, and enrich_run() does the same but tracks the run and hands it back
+    for later recompute() (enrich() skips that bookkeeping).
+    """
+
+    def __init__(self):
+        self.graph = self.build_graph()
+        self.graph.order()  # surface cycles at construction time
+
+    @abstractmethod
+    def build_graph(self) -> EnrichmentGraph:
+        """Register the enrichment steps with their inputs and outputs."""
+        pass
+
+    def enrich_run(self, character: Character) -> EnrichmentRun:
+        return self.graph.run(character, recompute=True)
+
+    def enrich(self, character: Character) -> Character:
+        self.graph.run(character)
+        return character
@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("Profiling")
+
+REPORT_FORMAT = 1
+MIB = 1024 * 1024
+# Parse events / list items between two budget checks inside one long section
+BUDGET_CHECK_EVERY = 4096
+
+# Categories shown in the report, in this order
+STAGE = "stages"
+RULE = "rules"
+STEP = "steps"
+
+# The profiler of the export currently running, None when profiling is off.
+# Instrumented code reads this once per unit of work and does nothing else when it's None.
+_active: Optional["Profiler"] = None
+
+
+def active() -> Optional["Profiler"]:
+    return _active
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """An export allocated more than its memory budget; only that file is abandoned."""
+    pass
+
+
+class Profiler:
+    """
+    Wall and CPU time per pipeline stage, per list rule and per enrichment step.
+    CPU time is per thread (time.thread_time), so GUI exports on a worker thread are
+    measured on their own.
+    """
+
+    def __init__(self):
+        # category -> name -> [calls, wall seconds, cpu seconds]
+        self.timings: Dict[str, Dict[str, List[float]]] = {}
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def start(self):
+        """Called when a session makes this profiler active."""
+        pass
+
+    def stop(self):
+        """Called when the session ends."""
+        pass
+
+    def check(self, where: str):
+        """Checkpoint inside a long section (see check_budget); only memory profilers act on it."""
+        pass
+
+    def add(self, category: str, name: str, wall: float, cpu: float):
+        entry = self.timings.setdefault(category, {}).get(name)
+        if entry is None:
+            self.timings[category][name] = [1, wall, cpu]
+        else:
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+
+    @contextmanager
+    def measure(self, category: str, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(category, name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def report(self, **meta: Any) -> Dict[str, Any]:
+        report: Dict[str, Any] = {"format": REPORT_FORMAT, **meta,
+                                  "wall_ms": round(self.wall * 1000, 3), "cpu_ms": round(self.cpu * 1000, 3)}
+        for category in (STAGE, RULE, STEP):
+            rows = []
+            for name, (calls, wall, cpu) in self.timings.get(category, {}).items():
+                rows.append({"name": name, "calls": calls, "wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu * 1000, 3),
+                             "share": round(wall / self.wall, 4) if self.wall else 0.0})
+            rows.sort(key=lambda row: row["wall_ms"], reverse=True)
+            report[category] = rows
+        return report
+
+    def write(self, path: str, **meta: Any) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**meta), f, indent=2)
+        return path
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        """Short human-readable digest for the log."""
+        lines = [f"Profile: {self.wall * 1000:.1f} ms wall, {self.cpu * 1000:.1f} ms CPU"]
+        report = self.report()
+        for category in (STAGE, RULE, STEP):
+            for row in report[category][:limit]:
+                lines.append(f"  {category[:-1]:5} {row['name']:<24} {row['wall_ms']:9.2f} ms wall {row['cpu_ms']:9.2f} ms CPU")
+        return lines
+
+
+class MemoryProfiler(Profiler):
+    """
+    Profiler that also accounts memory with tracemalloc: peak and retained bytes per
+    stage, list rule and enrichment step, measured from the moment the section starts.
+    - peak:     highest traced memory while the section ran (largest single call)
+    - retained: memory still allocated when it ended (summed over calls)
+    With a budget (bytes), the export is aborted with MemoryBudgetExceeded at the first
+    checkpoint that finds the peak above it: the end of every measured section, and
+    every BUDGET_CHECK_EVERY parse events / list items (or 64 KiB of input) while a file
+    is parsed and extracted (check_budget). A budget is therefore overshot by at most
+    what one stretch between checkpoints allocates.
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        super().__init__()
+        self.budget = budget
+        # category -> name -> [peak bytes, retained bytes]
+        self.memory: Dict[str, Dict[str, List[int]]] = {}
+        self.peak = 0
+        self.retained = 0
+        self._base = 0
+        self._owns_tracing = False
+        # Highest absolute peak seen inside each open section; nested sections reset the
+        # tracemalloc peak, so their parents learn it from here
+        self._open: List[int] = []
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak - self._base)
+        self.retained = current - self._base
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def check(self, where: str):
+        if self.budget is None:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._open:
+            peak = max(peak, max(self._open))
+        if peak - self._base > self.budget:
+            self.peak = max(self.peak, peak - self._base)
+            raise self._exceeded(f"during {where}")
+
+    def _exceeded(self, detected: str) -> MemoryBudgetExceeded:
+        return MemoryBudgetExceeded(
+            f"Memory budget exceeded: peak {self.peak / MIB:.1f} MiB > budget {self.budget / MIB:.1f} MiB ({detected})")
+
+    @contextmanager
+    def measure(self, category: str, name: str) -> Iterator[None]:
+        start, peak = tracemalloc.get_traced_memory()
+        if self._open:
+            self._open[-1] = max(self._open[-1], peak)
+        else:
+            self.peak = max(self.peak, peak - self._base)
+        tracemalloc.reset_peak()
+        self._open.append(start)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(category, name, time.perf_counter() - wall, time.thread_time() - cpu)
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._open.pop())
+            if self._open:
+                self._open[-1] = max(self._open[-1], peak)
+            self.peak = max(self.peak, peak - self._base)
+            entry = self.memory.setdefault(category, {}).get(name)
+            if entry is None:
+                self.memory[category][name] = [peak - start, current - start]
+            else:
+                entry[0] = max(entry[0], peak - start)
+                entry[1] += current - start
+        # Not reached while an exception (including an earlier budget abort) propagates
+        if self.budget is not None and self.peak > self.budget:
+            raise self._exceeded(f"detected after {category[:-1]} '{name}'")
+
+    def report(self, **meta: Any) -> Dict[str, Any]:
+        report = super().report(**meta)
+        for category in (STAGE, RULE, STEP):
+            memory = self.memory.get(category, {})
+            for row in report[category]:
+                peak, retained = memory.get(row["name"], (0, 0))
+                row["peak_kib"] = round(peak / 1024, 1)
+                row["retained_kib"] = round(retained / 1024, 1)
+        rules = sorted(self.memory.get(RULE, {}).items(), key=lambda item: item[1][0], reverse=True)
+        report["memory"] = {
+            "peak_mib": round(self.peak / MIB, 3),
+            "retained_mib": round(self.retained / MIB, 3),
+            "budget_mib": round(self.budget / MIB, 3) if self.budget is not None else None,
+            "top_rules": [name for name, _ in rules[:10]],
+        }
+        return report
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        lines = super().summary_lines(limit)
+        budget = f", budget {self.budget / MIB:.1f} MiB" if self.budget is not None else ""
+        lines.append(f"Memory: peak {self.peak / MIB:.1f} MiB, retained {self.retained / MIB:.1f} MiB{budget}")
+        for category in (STAGE, RULE):
+            rows = sorted(self.memory.get(category, {}).items(), key=lambda item: item[1][0], reverse=True)
+            for name, (peak, retained) in rows[:limit]:
+                lines.append(f"  {category[:-1]:5} {name:<24} {peak / 1024:9.1f} KiB peak {retained / 1024:9.1f} KiB retained")
+        return lines
+
+
+def check_budget(where: str):
+    """Raise MemoryBudgetExceeded now if the active profiler's budget is already exceeded."""
+    profiler = _active
+    if profiler is not None:
+        profiler.check(where)
+
+
+@contextmanager
+def section(category: str, name: str) -> Iterator[None]:
+    """Time a block under the active profiler; a plain pass-through when profiling is off."""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.measure(category, name):
+        yield
+
+
+@contextmanager
+def session(profiler: Optional[Profiler], cprofile_path: Optional[str] = None) -> Iterator[Optional[Profiler]]:
+    """Make profiler the active one for the duration (None leaves profiling off)."""
+    global _active
+    if profiler is None:
+        yield None
+        return
+
+    previous, _active = _active, profiler
+    profiler.start()
+    py_profile = None
+    if cprofile_path:
+        import cProfile
+        py_profile = cProfile.Profile()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    if py_profile is not None:
+        py_profile.enable()
+    try:
+        yield profiler
+    finally:
+        if py_profile is not None:
+            py_profile.disable()
+        profiler.wall += time.perf_counter() - wall
+        profiler.cpu += time.thread_time() - cpu
+        profiler.stop()
+        _active = previous
+        if py_profile is not None:
+            out_dir = os.path.dirname(cprofile_path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+            py_profile.dump_stats(cprofile_path)
+            logger.info(f"cProfile stats written to {cprofile_path} (open with python -m pstats)")
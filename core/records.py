@@ -0,0 +1,285 @@
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Field datatypes the rules YAML may declare (`datatype: int`); anything else is text
+DATATYPES = ("text", "int", "signed_int", "bool", "float")
+
+_MISSING = object()
+
+
+class _DeferredBase:
+    # Plain base that Record reads test against: isinstance() on an ABC goes through
+    # ABCMeta.__instancecheck__, several times slower on a path taken for every field
+    __slots__ = ()
+
+
+class Deferred(_DeferredBase, ABC):
+    """
+    A field value produced when it's read, e.g. long text decoded from the input file on
+    access (adapters.input.lazy_text). Records store it as is and hand out resolve().
+    """
+    __slots__ = ()
+
+    @abstractmethod
+    def resolve(self) -> Any:
+        """The value the field reads as."""
+
+
+class _Assigned(Deferred):
+    """A non-text value assigned to a typed field: read back exactly as it was given."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def resolve(self) -> Any:
+        return self.value
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+
+def _parse_int(text: str) -> int:
+    return int(text)
+
+
+def _parse_signed_int(text: str) -> int:
+    # int() already accepts "+3" / "-1"
+    return int(text)
+
+
+def _parse_bool(text: str) -> bool:
+    lowered = text.lower()
+    if lowered in ("1", "true", "yes", "on"):
+        return True
+    if lowered in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"not a boolean: {text!r}")
+
+
+def _parse_float(text: str) -> float:
+    return float(text)
+
+
+def _render_float(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# datatype -> (parse text, render value back to text)
+_CODECS: Dict[str, Tuple[Callable[[str], Any], Callable[[Any], str]]] = {
+    "int": (_parse_int, str),
+    "signed_int": (_parse_signed_int, lambda v: f"{v:+d}"),
+    "bool": (_parse_bool, lambda v: "1" if v else "0"),
+    "float": (_parse_float, _render_float),
+}
+
+
+def coerce(datatype: str, text: Any) -> Any:
+    """Parse text as datatype; raises ValueError/TypeError when it doesn't fit."""
+    codec = _CODECS.get(datatype)
+    if codec is None:
+        return text
+    return codec[0](text.strip() if isinstance(text, str) else text)
+
+
+def pack(datatype: str, text: str) -> Any:
+    """
+    Value to store for an extracted field: the coerced value when it renders back to
+    exactly the source text (so the dict view is unchanged), otherwise the text itself.
+    """
+    packer = make_packer(datatype)
+    return packer(text) if packer is not None else text
+
+
+def make_packer(datatype: str) -> Optional[Callable[[str], Any]]:
+    """pack() bound to one datatype (None for text), for per-item extraction loops."""
+    codec = _CODECS.get(datatype)
+    if codec is None:
+        return None
+    parse, render = codec
+
+    def packer(text: str) -> Any:
+        try:
+            value = parse(text)
+        except (TypeError, ValueError):
+            return text
+        return value if render(value) == text else text
+    return packer
+
+
+def field_value(item: Any, key: str, datatype: str, default: Any = None) -> Any:
+    """Typed value of an item field, for Records (coerced once) and plain dicts alike."""
+    if isinstance(item, Record):
+        return item.typed(key, default)
+    raw = item.get(key)
+    if raw is None:
+        return default
+    try:
+        return coerce(datatype, raw)
+    except (TypeError, ValueError):
+        return default
+
+
+class Record(MutableMapping):
+    """
+    Compact list item. Subclasses are generated per list rule (make_record_type) with one
+    __slots__ entry per declared field, so an item costs a small fixed-size object instead
+    of a dict. Declared datatypes are coerced once at extraction; the mapping interface
+    still returns the original text so writers keep working, while typed() hands back the
+    int/bool/float value; a value assigned later reads back exactly as it was given. Keys
+    that are not declared fields (added by enrichers) go to a small overflow dict. A
+    Deferred value (lazy text) is resolved on every read.
+    """
+    __slots__ = ("_extra",)
+
+    _list_name = ""
+    _fields: Tuple[str, ...] = ()
+    _types: Tuple[str, ...] = ()
+    _slot_of: Dict[str, str] = {}
+    _type_of: Dict[str, str] = {}
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        self._extra = None
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    @classmethod
+    def from_values(cls, values) -> "Record":
+        """Build from already-packed values in field order (None = field absent)."""
+        record = cls.__new__(cls)
+        record._extra = None
+        for slot, value in zip(cls.__slots__, values):
+            if value is not None:
+                setattr(record, slot, value)
+        return record
+
+    def _raw(self, key: str) -> Any:
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            return getattr(self, slot, _MISSING)
+        if self._extra is not None:
+            return self._extra.get(key, _MISSING)
+        return _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._raw(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        if isinstance(value, _DeferredBase):
+            return value.resolve()
+        datatype = self._type_of.get(key)
+        if datatype is None or isinstance(value, str):
+            return value
+        return _CODECS[datatype][1](value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def typed(self, key: str, default: Any = None) -> Any:
+        """The field as its declared datatype (or default if absent / not parseable)."""
+        value = self._raw(key)
+        if value is _MISSING:
+            return default
+        if isinstance(value, _DeferredBase):
+            value = value.resolve()
+        datatype = self._type_of.get(key)
+        if datatype is None or not isinstance(value, str):
+            return value
+        try:
+            return coerce(datatype, value)
+        except (TypeError, ValueError):
+            return default
+
+    def __setitem__(self, key: str, value: Any):
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            if key in self._type_of and not isinstance(value, (str, _DeferredBase)):
+                # Unwrapped, it would read back as packed: rendered to text
+                value = _Assigned(value)
+            setattr(self, slot, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            try:
+                delattr(self, slot)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self._raw(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._fields:
+            if getattr(self, self._slot_of[key], _MISSING) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        count = len(self._extra) if self._extra else 0
+        for slot in self.__slots__:
+            if hasattr(self, slot):
+                count += 1
+        return count
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __reduce__(self):
+        # Generated classes aren't importable by name: rebuild them from their signature
+        # Deferred values are resolved: their source (a mapped file) stays in this process
+        state = {}
+        for key in self:
+            value = self._raw(key)
+            state[key] = value.resolve() if isinstance(value, _DeferredBase) and not isinstance(value, _Assigned) else value
+        return (_restore_record, (self._list_name, self._fields, self._types, state))
+
+
+_record_types: Dict[Tuple[str, Tuple[str, ...], Tuple[str, ...]], type] = {}
+
+
+def make_record_type(list_name: str, fields: Tuple[str, ...], types: Tuple[str, ...]) -> type:
+    """Record subclass for one list rule (cached, so equal rules share a class)."""
+    signature = (list_name, tuple(fields), tuple(types))
+    record_type = _record_types.get(signature)
+    if record_type is None:
+        slots = tuple(f"f{i}" for i in range(len(fields)))
+        class_name = "".join(ch for ch in list_name.title() if ch.isalnum()) + "Record"
+        record_type = type(class_name, (Record,), {
+            "__slots__": slots,
+            "_list_name": list_name,
+            "_fields": tuple(fields),
+            "_types": tuple(types),
+            "_slot_of": dict(zip(fields, slots)),
+            "_type_of": {name: datatype for name, datatype in zip(fields, types) if datatype != "text"},
+        })
+        _record_types[signature] = record_type
+    return record_type
+
+
+def _restore_record(list_name: str, fields: Tuple[str, ...], types: Tuple[str, ...], state: Dict[str, Any]) -> Record:
+    record_type = make_record_type(list_name, fields, types)
+    record = record_type.__new__(record_type)
+    record._extra = None
+    for key, value in state.items():
+        # Raw values: packed ones must stay packed
+        slot = record_type._slot_of.get(key)
+        if slot is not None:
+            setattr(record, slot, value)
+        else:
+            record[key] = value
+    return record
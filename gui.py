@@ -4,34 +4,72 @@ import os
 import logging
 import sys
 import threading
-from PIL import Image, ImageTk
+from collections import deque
 
-# Import Core Logic
-from adapters.input.xml_reader import XMLReader
-from adapters.output.markdown_writer import MarkdownWriter
-# PDFWriter is imported lazily to capture errors in the GUI log
-from core.logic.factory import EnricherFactory
+# Only tkinter is imported up front so the window shows immediately. PIL (logo) and the
+# core logic (reader, enricher; writers load lazily in the pipeline) are imported by
+# _warm_up() in the background once the window is up, or on first export.
 
 # --- Setup Logging to a String (for Status Box) ---
 class TextHandler(logging.Handler):
-    def __init__(self, text_widget):
+    """
+    Buffers formatted records in a bounded ring buffer and pumps them into the Text widget
+    in one batch every `interval` ms, so a chatty export costs one widget update per tick
+    instead of one Tk event per record. The widget keeps at most max_lines; when a burst
+    overflows the buffer, the oldest lines are dropped and a marker says how many.
+    """
+    def __init__(self, text_widget, interval=100, max_lines=2000):
         super().__init__()
         self.text_widget = text_widget
+        self.interval = interval
+        self.max_lines = max_lines
+        self._buffer = deque(maxlen=max_lines)
+        self._emitted = 0  # records buffered so far (guarded by self.lock)
+        self._pumped = 0
+        self.text_widget.after(self.interval, self._pump)
 
     def emit(self, record):
-        msg = self.format(record)
-        def append():
-            self.text_widget.configure(state='normal')
-            self.text_widget.insert(tk.END, msg + '\n')
-            self.text_widget.see(tk.END)
-            self.text_widget.configure(state='disabled')
-        self.text_widget.after(0, append)
+        # Handler.handle() holds self.lock here, so the counter needs no extra locking
+        try:
+            self._buffer.append(self.format(record))
+            self._emitted += 1
+        except Exception:
+            self.handleError(record)
+
+    def _pump(self):
+        try:
+            self.flush_to_widget()
+            self.text_widget.after(self.interval, self._pump)
+        except tk.TclError:
+            pass  # Window closed
+
+    def flush_to_widget(self):
+        with self.lock:
+            lines = list(self._buffer)
+            self._buffer.clear()
+            dropped = self._emitted - self._pumped - len(lines)
+            self._pumped = self._emitted
+        if not lines:
+            return
+        if dropped:
+            lines.insert(0, f"... {dropped} log line(s) skipped ...")
+
+        widget = self.text_widget
+        follow = widget.yview()[1] >= 0.999  # only auto-scroll if the user is at the bottom
+        widget.configure(state='normal')
+        widget.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(widget.index('end-1c').split('.')[0]) - 1 - self.max_lines
+        if excess > 0:
+            widget.delete('1.0', f'{excess + 1}.0')
+        if follow:
+            widget.see(tk.END)
+        widget.configure(state='disabled')
 
 class ExporterGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Fantasy Grounds Exporter v0.9-beta")
-        self.root.geometry("700x650")
+        self.root.geometry("700x820")
         
         # --- Theme Colors ---
         self.colors = {
@@ -85,27 +123,61 @@ class ExporterGUI:
         # --- Layout ---
         self._build_header()
         self._build_main_content()
+        self._build_queue_panel()
         self._build_log_panel()
 
-        self.input_path = None
+        self.input_paths = []
+        # Background export worker, started on the first export
+        self.worker = None
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Runs once the main loop has drawn the window
+        self.root.after_idle(self._start_warm_up)
+
+    def _start_warm_up(self):
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        logo = self._load_logo_image()
+        if logo is not None:
+            self.root.after(0, lambda: self._show_logo(logo))
+        try:
+            import app.export_worker  # noqa: F401  (first export then starts without the import cost)
+        except Exception as e:
+            print(f"Preload error: {e}")
+
+    def _load_logo_image(self):
+        logo_path = os.path.join(self.base_dir, "logo.png")
+        if not os.path.exists(logo_path):
+            return None
+        try:
+            from PIL import Image
+            # Resize specifically for header
+            return Image.open(logo_path).resize((64, 64), Image.LANCZOS)
+        except Exception as e:
+            print(f"Logo error: {e}")
+            return None
+
+    def _show_logo(self, pil_image):
+        # PhotoImage must be created on the Tk thread
+        try:
+            from PIL import ImageTk
+            self.logo_img = ImageTk.PhotoImage(pil_image)
+            lbl_logo = tk.Label(self.logo_frame, image=self.logo_img, bg=self.colors["bg"])
+            lbl_logo.pack()
+        except Exception as e:
+            print(f"Logo error: {e}")
 
     def _build_header(self):
         # Header Frame
         header_frame = tk.Frame(self.root, bg=self.colors["bg"])
         header_frame.pack(fill="x", padx=20, pady=(20, 10))
         
-        # Logo
-        logo_path = os.path.join(self.base_dir, "logo.png")
-        if os.path.exists(logo_path):
-            try:
-                # Resize specifically for header
-                pil_image = Image.open(logo_path)
-                pil_image = pil_image.resize((64, 64), Image.LANCZOS)
-                self.logo_img = ImageTk.PhotoImage(pil_image)
-                lbl_logo = tk.Label(header_frame, image=self.logo_img, bg=self.colors["bg"])
-                lbl_logo.pack(side="left", padx=(0, 15))
-            except Exception as e:
-                print(f"Logo error: {e}")
+        # Logo (filled in by _warm_up; the slot keeps the layout from jumping)
+        self.logo_frame = tk.Frame(header_frame, bg=self.colors["bg"])
+        if os.path.exists(os.path.join(self.base_dir, "logo.png")):
+            self.logo_frame.configure(width=64, height=64)
+            self.logo_frame.pack(side="left", padx=(0, 15))
 
         # Title Text
         title_frame = tk.Frame(header_frame, bg=self.colors["bg"])
@@ -156,10 +228,26 @@ class ExporterGUI:
         self.combo_enricher['values'] = ["dnd5e", "none"]
         self.combo_enricher.current(0)
         self.combo_enricher.grid(row=0, column=3, sticky="w")
+
+        # Export cache: unchanged characters are copied from the cache instead of re-rendered
+        self.rebuild_var = tk.BooleanVar(value=False)
+        chk_rebuild = tk.Checkbutton(frame_grid, text="Force rebuild (ignore cache)", variable=self.rebuild_var,
+                                     bg=self.colors["bg"], fg=self.colors["fg"], selectcolor=self.colors["panel"],
+                                     activebackground=self.colors["bg"], activeforeground=self.colors["fg"],
+                                     font=('Segoe UI', 10))
+        chk_rebuild.grid(row=1, column=0, columnspan=2, sticky="w", pady=(10, 0))
+
+        # Timing report (<output>.profile.json) next to the exported file
+        self.profile_var = tk.BooleanVar(value=False)
+        chk_profile = tk.Checkbutton(frame_grid, text="Profile export (timing report)", variable=self.profile_var,
+                                     bg=self.colors["bg"], fg=self.colors["fg"], selectcolor=self.colors["panel"],
+                                     activebackground=self.colors["bg"], activeforeground=self.colors["fg"],
+                                     font=('Segoe UI', 10))
+        chk_profile.grid(row=1, column=2, columnspan=2, sticky="w", padx=(25, 0), pady=(10, 0))
         
         self.populate_rules()
 
-        # --- 3. Export Actions ---
+        # --- 3. Export Actions (each click queues jobs; exports run in the background) ---
         grp_actions = ttk.LabelFrame(main_frame, text="  3. Export  ", padding=15)
         grp_actions.pack(fill="x")
         
@@ -172,7 +260,36 @@ class ExporterGUI:
         
         # MD Button
         self.btn_md = ttk.Button(btn_frame, text="Generate Markdown", command=lambda: self.run_export("md"))
-        self.btn_md.pack(side="left", fill="x", expand=True, padx=(10, 0))
+        self.btn_md.pack(side="left", fill="x", expand=True, padx=(10, 10))
+
+        # Both (one parse/enrich for the two formats)
+        self.btn_both = ttk.Button(btn_frame, text="Generate Both", command=lambda: self.run_export("both"))
+        self.btn_both.pack(side="left", fill="x", expand=True, padx=(10, 0))
+
+    def _build_queue_panel(self):
+        grp_queue = ttk.LabelFrame(self.root, text="  4. Export Queue  ", padding=10)
+        grp_queue.pack(fill="x", padx=20, pady=(0, 10))
+
+        style = ttk.Style()
+        style.configure('Treeview', background=self.colors["panel"], fieldbackground=self.colors["panel"],
+                        foreground=self.colors["fg"], borderwidth=0, font=('Segoe UI', 9))
+        style.configure('Treeview.Heading', background=self.colors["bg"], foreground=self.colors["accent"],
+                        font=('Segoe UI', 9, 'bold'))
+
+        self.tree_jobs = ttk.Treeview(grp_queue, columns=("file", "format", "status"), show="headings", height=5)
+        self.tree_jobs.heading("file", text="File")
+        self.tree_jobs.heading("format", text="Format")
+        self.tree_jobs.heading("status", text="Status")
+        self.tree_jobs.column("file", width=260)
+        self.tree_jobs.column("format", width=70, anchor="center")
+        self.tree_jobs.column("status", width=260)
+        self.tree_jobs.pack(side="left", fill="x", expand=True)
+
+        queue_buttons = tk.Frame(grp_queue, bg=self.colors["bg"])
+        queue_buttons.pack(side="left", fill="y", padx=(10, 0))
+        ttk.Button(queue_buttons, text="Cancel", command=self.cancel_selected).pack(fill="x", pady=(0, 5))
+        ttk.Button(queue_buttons, text="Cancel All", command=self.cancel_all).pack(fill="x", pady=(0, 5))
+        ttk.Button(queue_buttons, text="Clear Done", command=self.clear_finished).pack(fill="x")
 
     def _build_log_panel(self):
         log_frame = ttk.LabelFrame(self.root, text="  Process Log  ", padding=10)
@@ -215,93 +332,98 @@ class ExporterGUI:
             self.combo_rules.current(0)
 
     def select_file(self):
-        path = filedialog.askopenfilename(filetypes=[("XML Files", "*.xml")])
-        if path:
-            self.input_path = path
-            self.lbl_file.config(text=path, foreground=self.colors["accent"])
+        paths = filedialog.askopenfilenames(filetypes=[("XML Files", "*.xml"), ("Character Snapshots", "*.fgsnap *.fgsnap.json")])
+        if paths:
+            self.input_paths = list(paths)
+            text = paths[0] if len(paths) == 1 else f"{len(paths)} files selected ({os.path.dirname(paths[0])})"
+            self.lbl_file.config(text=text, foreground=self.colors["accent"])
 
     def run_export(self, format_type):
-        if not self.input_path:
+        if not self.input_paths:
             messagebox.showwarning("Warning", "Please select an XML file first.")
             return
-            
-        base_name = os.path.splitext(os.path.basename(self.input_path))[0]
-        initial_dir = os.path.dirname(self.input_path) 
-        
-        file_ext = f".{format_type}"
-        file_types = [(f"{format_type.upper()} Files", f"*{file_ext}"), ("All Files", "*.*")]
-        
-        out_path = filedialog.asksaveasfilename(
-            defaultextension=file_ext,
-            filetypes=file_types,
-            initialdir=initial_dir,
-            initialfile=f"{base_name}{file_ext}",
-            title=f"Export {format_type.upper()}"
-        )
-        
-        if not out_path:
-            return 
 
-        rules_filename = self.rules_var.get()
-        rules_path = os.path.join(self.base_dir, rules_filename)
-        enricher_name = self.enricher_var.get()
-        
-        # Disable buttons during processing
-        self._toggle_buttons(False)
-        
-        # Run in thread
-        t = threading.Thread(target=self._process, args=(self.input_path, rules_path, enricher_name, format_type, out_path))
-        t.start()
-    
-    def _toggle_buttons(self, state):
-        self.btn_select.configure(state="normal" if state else "disabled")
-        self.btn_pdf.configure(state="normal" if state else "disabled")
-        self.btn_md.configure(state="normal" if state else "disabled")
+        if len(self.input_paths) == 1 and format_type != "both":
+            # Single file, single format: let the user pick the exact output file
+            input_path = self.input_paths[0]
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+            file_ext = f".{format_type}"
+            file_types = [(f"{format_type.upper()} Files", f"*{file_ext}"), ("All Files", "*.*")]
+            out_path = filedialog.asksaveasfilename(
+                defaultextension=file_ext,
+                filetypes=file_types,
+                initialdir=os.path.dirname(input_path),
+                initialfile=f"{base_name}{file_ext}",
+                title=f"Export {format_type.upper()}"
+            )
+            if not out_path:
+                return
+            targets = [(input_path, os.path.splitext(out_path)[0], out_path)]
+        else:
+            out_dir = filedialog.askdirectory(initialdir=os.path.dirname(self.input_paths[0]),
+                                              title=f"Export {format_type.upper()} to folder")
+            if not out_dir:
+                return
+            from app.batch import plan_outputs
+            targets = [(path, base_output, None) for path, base_output in plan_outputs(self.input_paths, out_dir)]
 
-    def _process(self, input_path, rules_path, enricher_name, format_type, output_path):
-        logging.info(f"--- Starting {format_type.upper()} Export ---")
-        try:
-            # 1. Read
-            logging.info(f"Loading rules: {os.path.basename(rules_path)}")
-            reader = XMLReader(rules_path)
-            logging.info(f"Parsing: {os.path.basename(input_path)}")
-            character = reader.parse(input_path)
-            
-            # 2. Enrich
-            logging.info(f"Enriching with logic module: {enricher_name}")
-            enricher = EnricherFactory.get(enricher_name)
-            character = enricher.enrich(character)
-            
-            # 3. Write
-            success = False
-            if format_type == "pdf":
-                try:
-                    from adapters.output.pdf_writer import PDFWriter
-                    logging.info(f"Generating PDF...")
-                    writer = PDFWriter()
-                    writer.write(character, output_path)
-                    success = True
-                except ImportError as e:
-                    logging.error(f"PDF support missing: {e}")
-                except Exception as e:
-                    logging.error(f"PDF error: {e}")
-                
-            elif format_type == "md":
-                logging.info(f"Generating Markdown...")
-                writer = MarkdownWriter()
-                writer.write(character, output_path)
-                success = True
-                
-            if success:
-                logging.info(f"SUCCESS! Saved to: {os.path.basename(output_path)}")
-                # Removed popup as requested
-            else:
-                logging.warning("Export finished with errors.")
-            
-        except Exception as e:
-            logging.error(f"Critical Error: {e}")
-        finally:
-             self.root.after(0, lambda: self._toggle_buttons(True))
+        from app.export_worker import ExportJob
+        rules_path = os.path.join(self.base_dir, self.rules_var.get())
+        for input_path, base_output, out_path in targets:
+            job = ExportJob(input_path, base_output, format_type, rules_path, self.enricher_var.get(),
+                            rebuild=self.rebuild_var.get(), profile=self.profile_var.get(), output_path=out_path)
+            self.tree_jobs.insert("", "end", iid=str(job.id),
+                                  values=(os.path.basename(input_path), format_type.upper(), "queued"))
+            self._get_worker().submit(job)
+
+    def _get_worker(self):
+        if self.worker is None:
+            from app.export_worker import ExportWorker
+            # Updates arrive on the worker thread; the tree is only touched on the Tk thread
+            self.worker = ExportWorker(on_update=lambda job: self.root.after(0, self._show_job, job))
+        return self.worker
+
+    def _show_job(self, job):
+        iid = str(job.id)
+        if not self.tree_jobs.exists(iid):
+            return
+        if job.status == "running":
+            status = f"running: {job.stage}" if job.stage else "running"
+        elif job.status == "done":
+            status = f"done ({job.result.seconds:.2f}s)"
+            if job.result.cache_hits and not job.result.cache_misses:
+                status += ", from cache"
+            logging.info(f"SUCCESS! Saved to: {', '.join(os.path.basename(o) for o in job.result.outputs)}")
+        elif job.status == "failed":
+            errors = job.result.errors if job.result else {}
+            status = "failed: " + "; ".join(f"{stage}: {msg}" for stage, msg in errors.items())
+            for stage, msg in errors.items():
+                logging.error(f"{stage.upper()} error: {msg}")
+            logging.warning("Export finished with errors.")
+        else:
+            status = job.status
+        self.tree_jobs.set(iid, "status", status)
+
+    def cancel_selected(self):
+        if self.worker is not None:
+            for iid in self.tree_jobs.selection():
+                self.worker.cancel(int(iid))
+
+    def cancel_all(self):
+        if self.worker is not None:
+            self.worker.cancel_all()
+
+    def clear_finished(self):
+        if self.worker is None:
+            return
+        for job in self.worker.forget_finished():
+            if self.tree_jobs.exists(str(job.id)):
+                self.tree_jobs.delete(str(job.id))
+
+    def _on_close(self):
+        if self.worker is not None:
+            self.worker.shutdown()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
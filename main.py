@@ -2,8 +2,8 @@ import argparse
 import logging
 import sys
 import os
-from adapters.input.xml_reader import XMLReader
-from adapters.output.markdown_writer import MarkdownWriter
+from app.export_cache import ExportCache
+from app.pipeline import ExportPipeline
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -17,13 +17,88 @@ def main():
     3. Orchestrating the flow
     """
     parser = argparse.ArgumentParser(description="Fantasy Grounds Character Exporter")
-    parser.add_argument("--input", "-i", required=False, help="Path to input FGU XML file")
-    parser.add_argument("--output", "-o", required=False, help="Path to output Markdown file")
+    parser.add_argument("--input", "-i", required=False, help="Path to input FGU XML file (or a .fgsnap snapshot)")
+    parser.add_argument("--output", "-o", required=False, help="Path to output Markdown file ('-' streams Markdown to stdout)")
     parser.add_argument("--rules", "-r", default="dnd5e_rules.yaml", help="Path to configuration file")
     parser.add_argument("--enricher", "-e", default="dnd5e", help="Logic Module to use (dnd5e, none)")
-    parser.add_argument("--format", "-f", default="both", help="Output format (pdf, md, both)")
+    parser.add_argument("--format", "-f", default="both", help="Output format (pdf, md, both, spellbook.pdf, or a list such as md,pdf)")
+    parser.add_argument("--stream", action="store_true", help="Parse the XML incrementally (lower memory on large exports)")
+    parser.add_argument("--lazy-text", action="store_true", help="Keep long descriptions and spell/weapon subtrees on disk and decode them when read: ~10x less memory held for spell-heavy characters, ~1.5x slower parse")
+    parser.add_argument("--batch", "-b", nargs="+", metavar="SOURCE", help="Batch export: directories, glob patterns or list files (@roster.txt)")
+    parser.add_argument("--campaign", metavar="DB_XML", help="Export every character in a campaign db.xml (single streaming read)")
+    parser.add_argument("--watch", metavar="DIR", help="Watch a folder and re-export characters whenever FGU writes them")
+    parser.add_argument("--save-snapshot", metavar="PATH", help="Save the enriched character to a snapshot (.fgsnap) that -i can render from without parsing or enriching")
+    parser.add_argument("--snapshot-codec", default="auto", choices=("auto", "msgpack", "json"), help="Snapshot encoding (auto: msgpack when installed, else JSON)")
+    parser.add_argument("--serve", nargs="?", const="127.0.0.1:8765", metavar="ADDR", help="Run a warm local export service over HTTP on HOST:PORT (default 127.0.0.1:8765) or unix:/path.sock")
+    parser.add_argument("--serve-stdio", action="store_true", help="Run the export service over stdin/stdout JSON lines")
+    parser.add_argument("--output-dir", default="output", help="Output folder for batch/campaign/watch exports")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes for batch exports and the service (default: available cores)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore cached exports and regenerate everything")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the export cache entirely")
+    parser.add_argument("--profile", action="store_true", help="Write <output>.profile.json with wall/CPU time per stage, list rule and enrichment step (implies --rebuild)")
+    parser.add_argument("--cprofile", action="store_true", help="With --profile, also dump cProfile stats to <output>.pstats")
+    parser.add_argument("--memory", action="store_true", help="Like --profile, plus peak/retained memory per stage, list rule and step (tracemalloc; slower)")
+    parser.add_argument("--memory-budget", type=float, metavar="MB", help="Abandon any file whose export allocates more than MB megabytes")
     
     args = parser.parse_args()
+    args.profile = args.profile or args.memory
+    memory_budget = int(args.memory_budget * 1024 * 1024) if args.memory_budget else None
+
+    if args.profile and (args.watch or args.batch or args.campaign):
+        logger.warning("--profile/--memory apply to single-file exports; ignoring them.")
+    if args.campaign:
+        # Records come out of one streaming read with no file of their own to cache or map
+        ignored = [flag for flag, used in (("--stream", args.stream), ("--lazy-text", args.lazy_text),
+                                           ("--rebuild", args.rebuild), ("--no-cache", args.no_cache)) if used]
+        if ignored:
+            logger.warning(f"{', '.join(ignored)} do not apply to campaign exports (always streamed, never cached); ignoring them.")
+
+    if args.serve or args.serve_stdio:
+        if not os.path.exists(args.rules):
+            logger.error(f"Rules config not found at: {args.rules}")
+            sys.exit(1)
+        from app.service import ExportService, parse_address, serve_http, serve_stdio
+        if args.serve and not args.serve_stdio:
+            try:
+                parse_address(args.serve)
+            except ValueError as e:
+                logger.error(str(e))
+                sys.exit(1)
+        service = ExportService(args.rules, args.enricher, workers=args.jobs, use_cache=not args.no_cache,
+                                memory_budget=memory_budget)
+        if args.serve_stdio:
+            serve_stdio(service)
+        else:
+            try:
+                serve_http(service, args.serve)
+            except (OSError, ValueError) as e:
+                logger.error(f"Cannot serve on {args.serve}: {e}")
+                sys.exit(1)
+        sys.exit(0)
+
+    if args.watch:
+        if not os.path.isdir(args.watch):
+            logger.error(f"Watch folder not found: {args.watch}")
+            sys.exit(1)
+        from app.watch import FolderWatcher
+        cache = None if args.no_cache else ExportCache(refresh=args.rebuild)
+        # Rules, enricher and writers stay warm for the whole session
+        pipeline = ExportPipeline(args.rules, args.enricher, streaming=args.stream, cache=cache,
+                                  memory_budget=memory_budget, lazy_text=args.lazy_text)
+        FolderWatcher(args.watch, pipeline, args.output_dir, args.format).run()
+        sys.exit(0)
+
+    if args.batch or args.campaign:
+        if not os.path.exists(args.rules):
+            logger.error(f"Rules config not found at: {args.rules}")
+            sys.exit(1)
+        from app.batch import run_batch, run_campaign
+        if args.campaign:
+            sys.exit(run_campaign(args.campaign, args.output_dir, args.rules, args.enricher, args.format,
+                                  memory_budget=memory_budget))
+        sys.exit(run_batch(args.batch, args.output_dir, args.rules, args.enricher, args.format, args.jobs,
+                           streaming=args.stream, use_cache=not args.no_cache, rebuild=args.rebuild,
+                           memory_budget=memory_budget, lazy_text=args.lazy_text))
 
     # Default to hardcoded test file if not provided (for ease of use during dev)
     input_path = args.input
@@ -32,13 +107,15 @@ def main():
         default_test = os.path.join("input FGU characters", "Rook.xml")
         if os.path.exists(default_test):
             input_path = default_test
-            print(f"No input specified. Using default: {input_path}")
+            logger.info(f"No input specified. Using default: {input_path}")
         else:
             logger.error("No input file passed and default 'Rook.xml' not found.")
             sys.exit(1)
 
     output_path = args.output
-    if not output_path:
+    if args.save_snapshot:
+        pass  # only the snapshot is written
+    elif not output_path:
         # Auto-generate output name in /output folder
         output_dir = "output"
         os.makedirs(output_dir, exist_ok=True)
@@ -47,7 +124,7 @@ def main():
         base_name = os.path.basename(input_path)
         name_without_ext = os.path.splitext(base_name)[0]
         output_path = os.path.join(output_dir, f"{name_without_ext}.md")
-        print(f"No output specified. Generating: {output_path}")
+        logger.info(f"No output specified. Generating: {output_path}")
     else:
         # Ensure directory exists if user provided one
         output_dir = os.path.dirname(output_path)
@@ -61,56 +138,52 @@ def main():
 
     # --- HEXAGONAL ORCHESTRATION ---
     
-    # 1. Init Adapters
+    # 1. Init Adapters (reader + enricher; writers are loaded on first use)
     try:
-        reader = XMLReader(rules_path)
-        writer = MarkdownWriter()
+        # A profile of a cache hit measures nothing: profiling always regenerates
+        cache = None if args.no_cache else ExportCache(refresh=args.rebuild or args.profile)
+        pipeline = ExportPipeline(rules_path, args.enricher, streaming=args.stream, cache=cache,
+                                  memory_budget=memory_budget, lazy_text=args.lazy_text)
     except Exception as e:
         logger.error(f"Failed to initialize adapters: {e}")
         sys.exit(1)
 
-    # 2. Extract Data (Input -> Domain)
-    try:
-        logger.info(f"Reading character from {input_path}...")
-        character = reader.parse(input_path)
-    except Exception as e:
-        logger.error(f"Extraction failed: {e}")
-        sys.exit(1)
+    if args.save_snapshot:
+        result = pipeline.save_snapshot(input_path, args.save_snapshot, args.snapshot_codec)
+        for stage, msg in result.errors.items():
+            logger.error(f"{stage.upper()} error: {msg}")
+        sys.exit(0 if result.ok else 1)
 
-    # 2.5 Enrich Data (Strategy Pattern)
-    try:
-        from core.logic.factory import EnricherFactory
-        enricher = EnricherFactory.get(args.enricher)
-        character = enricher.enrich(character)
-    except Exception as e:
-        logger.warning(f"Enrichment step failed: {e}")
+    if output_path == "-":
+        # Markdown straight to stdout, written as it's rendered; logs stay on stderr
+        if args.format.lower() not in ("md", "both"):
+            logger.error("Only Markdown can be streamed to stdout; use -f md with -o -")
+            sys.exit(1)
+        result = pipeline.export_stream(input_path, sys.stdout)
+        for stage, msg in result.errors.items():
+            logger.error(f"{stage.upper()} error: {msg}")
+        sys.exit(0 if result.ok else 1)
 
-    # 3. Write
+    # 2. Extract -> Enrich -> Write (skipped entirely when the cached outputs are current)
+    logger.info(f"Reading character from {input_path}...")
     base_output = output_path.replace(".md", "")
-    
-    fmt = args.format.lower()
-    
-    try:
-        if fmt in ["md", "both"]:
-            logger.info(f"Writing markdown to {base_output}.md...")
-            writer = MarkdownWriter()
-            writer.write(character, base_output + ".md")
-
-        if fmt in ["pdf", "both"]:
-            try:
-                from adapters.output.pdf_writer import PDFWriter
-                logger.info(f"Writing PDF to {base_output}.pdf...")
-                pdf_writer = PDFWriter()
-                pdf_writer.write(character, base_output + ".pdf")
-            except ImportError:
-                logger.warning("ReportLab not found. Skipping PDF generation.")
-            except Exception as e:
-                logger.error(f"Failed to generate PDF: {e}")
+    if args.profile:
+        result = pipeline.export_profiled(input_path, base_output, args.format, cprofile=args.cprofile, memory=args.memory)
+    else:
+        result = pipeline.export(input_path, base_output, args.format)
 
-        logger.info("Done!")
-    except Exception as e:
-        logger.error(f"Writing failed: {e}")
+    if cache is not None:
+        logger.info(cache.stats_line())
+    if "read" in result.errors:
+        logger.error(f"Extraction failed: {result.errors['read']}")
+        sys.exit(1)
+    if "enrich" in result.errors:
+        logger.error(f"Export abandoned: {result.errors['enrich']}")
+        sys.exit(1)
+    if "md" in result.errors:
+        logger.error(f"Writing failed: {result.errors['md']}")
         sys.exit(1)
+    logger.info("Done!")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,19 @@
+import pytest
+
+from core.domain import Character
+from core.logic.dnd5e import DnD5eEnricher
+from core.records import make_record_type
+
+SkillRecord = make_record_type("Skills", ("Skill", "Total"), ("text", "int"))
+
+
+@pytest.mark.parametrize("make", (dict, SkillRecord), ids=("dict", "record"))
+@pytest.mark.parametrize("skill, expected", [
+    ({"Skill": "Perception", "Total": "+3"}, "13"),
+    ({"Skill": "Perception"}, "10"),
+    ({"Skill": "Perception", "Total": "n/a"}, None),
+])
+def test_passive_perception(make, skill, expected):
+    character = Character(data_points={}, lists={"Skills": [make(skill)]})
+    DnD5eEnricher().enrich(character)
+    assert character.data_points.get("Passive Perception") == expected
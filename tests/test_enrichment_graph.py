@@ -0,0 +1,91 @@
+import logging
+import os
+from collections.abc import Mapping
+
+import pytest
+
+from adapters.input.xml_reader import XMLReader
+from benchmarks.synthetic import make_character_xml
+from core.domain import Character
+from core.logic.dnd5e import ABILITIES, DnD5eEnricher
+from core.logic.graph import EnrichmentGraph
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+
+
+def _plain(value):
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _state(character):
+    return _plain(character.data_points), _plain(character.lists)
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    logging.disable(logging.WARNING)
+    path = tmp_path_factory.mktemp("enrich") / "hero.xml"
+    path.write_text(make_character_xml(powers=60, weapons=8, damage_components=3), encoding="utf-8")
+    yield XMLReader(RULES_PATH), str(path)
+    logging.disable(logging.NOTSET)
+
+
+CHANGES = {
+    "nothing": (lambda c: None, ("Weapons", "Spells & Powers", "Classes", "Skills") + tuple(ABILITIES)),
+    "Dexterity Modifier": (lambda c: c.data_points.__setitem__("Dexterity Modifier", "+5"), ("Dexterity Modifier",)),
+    "Proficiency Bonus": (lambda c: c.data_points.__setitem__("Proficiency Bonus", "+6"), ("Proficiency Bonus",)),
+}
+
+
+@pytest.mark.parametrize("label", sorted(CHANGES))
+def test_recompute_matches_fresh_enrich(source, label):
+    reader, path = source
+    change, keys = CHANGES[label]
+    enricher = DnD5eEnricher()
+
+    character = reader.parse(path)
+    run = enricher.enrich_run(character)
+    change(character)
+    run.recompute(*keys)
+
+    expected = reader.parse(path)
+    change(expected)
+    enricher.enrich(expected)
+    assert _state(character) == _state(expected)
+
+
+def test_tracked_and_untracked_runs_enrich_alike(source):
+    reader, path = source
+    tracked, untracked = reader.parse(path), reader.parse(path)
+    DnD5eEnricher().enrich_run(tracked)
+    DnD5eEnricher().enrich(untracked)
+    assert _state(tracked) == _state(untracked)
+
+
+def test_untracked_run_refuses_recompute():
+    graph = EnrichmentGraph().add("total", lambda c, d: {"total": 1})
+    run = graph.run(Character())
+    assert run.executed == ["total"] and not run.replaced
+    with pytest.raises(ValueError):
+        run.recompute("total")
+
+
+def test_steps_run_in_dependency_order():
+    calls = []
+    graph = EnrichmentGraph()
+    graph.add("second", lambda c, d: calls.append("second"), requires=["first"])
+    graph.add("first", lambda c, d: calls.append("first") or {"first": True}, writes=["first"])
+    graph.run(Character())
+    assert calls == ["first", "second"]
+
+
+def test_cycle_is_reported():
+    graph = EnrichmentGraph()
+    graph.add("a", lambda c, d: None, reads=["b"], writes=["a"])
+    graph.add("b", lambda c, d: None, reads=["a"], writes=["b"])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.order()
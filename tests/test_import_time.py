@@ -0,0 +1,35 @@
+"""Cold-start budget: importing the GUI stays fast and leaves the heavy modules for later."""
+import pytest
+
+from benchmarks.bench_import import best_import_times
+
+BUDGET_MS = 100.0
+REPEAT = 3
+
+# Loaded on first use only; importing any of these at startup is a regression
+LAZY_MODULES = {
+    "gui": ("PIL", "yaml", "reportlab", "app.export_worker", "app.pipeline", "app.export_cache", "adapters.input.xml_reader",
+            "adapters.output.markdown_writer", "adapters.output.markdown_stream", "adapters.output.pdf_writer",
+            "adapters.output.spellbook_pdf", "core.logic.dnd5e"),
+    "core.logic.factory": ("core.logic.dnd5e", "core.logic.graph"),
+    "app.pipeline": ("yaml", "reportlab", "adapters.output.markdown_writer", "adapters.output.markdown_stream",
+                     "adapters.output.pdf_writer", "adapters.output.spellbook_pdf", "core.logic.dnd5e", "cProfile"),
+}
+
+
+def _times(module):
+    if module == "gui":
+        pytest.importorskip("tkinter")
+    return best_import_times(module, REPEAT)
+
+
+@pytest.mark.parametrize("module", sorted(LAZY_MODULES))
+def test_heavy_modules_load_lazily(module):
+    times = _times(module)
+    eager = [name for name in LAZY_MODULES[module] if name in times]
+    assert not eager, f"import {module} pulls in {', '.join(eager)} at startup"
+
+
+def test_gui_import_within_budget():
+    total_ms = _times("gui")["gui"][1] / 1000
+    assert total_ms <= BUDGET_MS, f"import gui took {total_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)"
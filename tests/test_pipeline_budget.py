@@ -0,0 +1,47 @@
+import os
+
+from app.export_cache import ExportCache
+from app.pipeline import ExportPipeline
+from benchmarks.synthetic import make_character_xml
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dnd5e_rules.yaml")
+MIB = 1024 * 1024
+
+
+class HungryWriter:
+    """Allocates more than the budget while writing."""
+
+    def write(self, character, output_path):
+        ballast = bytearray(40 * MIB)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(str(len(ballast)))
+
+
+class SmallWriter:
+    def write(self, character, output_path):
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("ok")
+
+
+def _pipeline(tmp_path, writer):
+    pipeline = ExportPipeline(RULES_PATH, cache=ExportCache(str(tmp_path / "cache")), memory_budget=20 * MIB)
+    pipeline._writers["md"] = writer
+    source = tmp_path / "hero.xml"
+    source.write_text(make_character_xml(powers=20, weapons=2, inventory=5), encoding="utf-8")
+    return pipeline, str(source)
+
+
+def test_budget_abort_with_cache_is_reported_not_raised(tmp_path):
+    pipeline, source = _pipeline(tmp_path, HungryWriter())
+    result = pipeline.export(source, str(tmp_path / "out" / "hero"), "md")
+    assert "Memory budget exceeded" in result.errors["md"]
+    assert result.outputs == []
+    assert not os.path.exists(tmp_path / "out" / "hero.md")
+
+
+def test_export_within_budget_is_cached(tmp_path):
+    pipeline, source = _pipeline(tmp_path, SmallWriter())
+    base_output = str(tmp_path / "out" / "hero")
+    assert pipeline.export(source, base_output, "md").ok
+    again = pipeline.export(source, base_output, "md")
+    assert again.ok and again.cache_hits == 1
@@ -0,0 +1,50 @@
+import pickle
+
+import pytest
+
+from adapters.input.snapshot import from_document, to_document
+from core.domain import Character
+from core.records import DATATYPES, Deferred, make_record_type, pack
+
+ROUND_TRIP_VALUES = ("6", "+3", "1", 6, -2, 0, True, False, 2, 1.5, 3.0, None, ["a", 1])
+
+
+def _set(datatype, value):
+    record = make_record_type("Round Trip", ("Value",), (datatype,))()
+    record["Value"] = value
+    return record
+
+
+def _assert_same(got, value):
+    assert type(got) is type(value) and got == value, f"set {value!r}, got {got!r}"
+
+
+@pytest.mark.parametrize("datatype", DATATYPES)
+@pytest.mark.parametrize("value", ROUND_TRIP_VALUES, ids=repr)
+def test_assigned_value_reads_back_unchanged(datatype, value):
+    _assert_same(_set(datatype, value)["Value"], value)
+
+
+@pytest.mark.parametrize("datatype", DATATYPES)
+@pytest.mark.parametrize("value", ROUND_TRIP_VALUES, ids=repr)
+def test_assigned_value_survives_pickle(datatype, value):
+    _assert_same(pickle.loads(pickle.dumps(_set(datatype, value)))["Value"], value)
+
+
+@pytest.mark.parametrize("datatype", DATATYPES)
+@pytest.mark.parametrize("value", ROUND_TRIP_VALUES, ids=repr)
+def test_assigned_value_survives_snapshot(datatype, value):
+    character = Character(data_points={}, lists={"Round Trip": [_set(datatype, value)]})
+    _assert_same(from_document(to_document(character)).lists["Round Trip"][0]["Value"], value)
+
+
+def test_extracted_text_reads_back_as_source_and_typed():
+    record_type = make_record_type("Typed", ("Count", "Bonus", "Weight"), ("int", "signed_int", "float"))
+    record = record_type.from_values([pack("int", "3"), pack("signed_int", "+2"), pack("float", "1.50")])
+    assert dict(record) == {"Count": "3", "Bonus": "+2", "Weight": "1.50"}
+    assert (record.typed("Count"), record.typed("Bonus"), record.typed("Weight")) == (3, 2, 1.5)
+
+
+def test_deferred_is_abstract():
+    with pytest.raises(TypeError):
+        Deferred()